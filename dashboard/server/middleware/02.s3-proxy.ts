@@ -21,5 +21,6 @@ export default defineEventHandler(async (event) => {
     requireAuth(event)
   }
 
-  return proxyS3Path(event, path)
+  // Sample files come with a byte-offset index, so a client can fetch one station's rows only.
+  return proxyS3Path(event, path, { ranges: path.startsWith('discrete/') })
 })
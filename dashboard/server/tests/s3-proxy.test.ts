@@ -0,0 +1,95 @@
+import { beforeEach, describe, it, expect, vi } from 'vitest'
+
+import { proxyS3Path } from '#server/utils/s3-proxy'
+
+type FakeEvent = {
+  method: string
+  requestHeaders: Record<string, string>
+  responseHeaders: Record<string, unknown>
+  status?: number
+  node: { res: { end: () => void } }
+}
+
+const send = vi.fn()
+
+// The proxy relies on Nuxt auto-imports, which are not available outside of Nuxt.
+vi.stubGlobal('s3', { send })
+vi.stubGlobal('QAQC_AWS_S3_BUCKET', 'test-bucket')
+vi.stubGlobal('QAQC_AWS_S3_CACHE_MAX_AGE', 60)
+vi.stubGlobal('getHeader', (event: FakeEvent, name: string) => event.requestHeaders[name])
+vi.stubGlobal('setHeader', (event: FakeEvent, name: string, value: unknown) => {
+  event.responseHeaders[name] = value
+})
+vi.stubGlobal('setResponseStatus', (event: FakeEvent, status: number) => {
+  event.status = status
+})
+vi.stubGlobal('createError', (input: { statusCode: number; statusMessage: string }) =>
+  Object.assign(new Error(input.statusMessage), input),
+)
+
+function fakeEvent(requestHeaders: Record<string, string> = {}): FakeEvent {
+  return { method: 'GET', requestHeaders, responseHeaders: {}, node: { res: { end: vi.fn() } } }
+}
+
+function fakeObject(output: Record<string, unknown> = {}) {
+  return { ContentLength: 1000, Body: { transformToWebStream: () => 'stream' }, ...output }
+}
+
+describe('s3 proxy ranges', () => {
+  beforeEach(() => {
+    send.mockReset()
+  })
+
+  it('should answer a Range request with 206 and Content-Range', async () => {
+    send.mockResolvedValue(fakeObject({ ContentLength: 100, ContentRange: 'bytes 0-99/1000' }))
+    const event = fakeEvent({ range: 'bytes=0-99' })
+
+    const body = await proxyS3Path(event as any, 'discrete/samples.csv', { ranges: true })
+
+    expect(send.mock.calls[0][0].input.Range).toBe('bytes=0-99')
+    expect(event.status).toBe(206)
+    expect(event.responseHeaders['Content-Range']).toBe('bytes 0-99/1000')
+    expect(event.responseHeaders['Content-Length']).toBe(100)
+    expect(event.responseHeaders['Accept-Ranges']).toBe('bytes')
+    expect(body).toBe('stream')
+  })
+
+  it('should answer an unsatisfiable Range with 416', async () => {
+    send.mockRejectedValue(
+      Object.assign(new Error('The requested range is not satisfiable'), {
+        name: 'InvalidRange',
+        $metadata: { httpStatusCode: 416 },
+      }),
+    )
+    const event = fakeEvent({ range: 'bytes=5000-' })
+
+    await expect(
+      proxyS3Path(event as any, 'discrete/samples.csv', { ranges: true }),
+    ).rejects.toMatchObject({ statusCode: 416 })
+  })
+
+  it('should send the whole object without a Range header', async () => {
+    send.mockResolvedValue(fakeObject())
+    const event = fakeEvent()
+
+    const body = await proxyS3Path(event as any, 'discrete/samples.csv', { ranges: true })
+
+    expect(send.mock.calls[0][0].input.Range).toBeUndefined()
+    expect(event.status).toBeUndefined()
+    expect(event.responseHeaders['Content-Range']).toBeUndefined()
+    expect(event.responseHeaders['Content-Length']).toBe(1000)
+    expect(event.responseHeaders['Accept-Ranges']).toBe('bytes')
+    expect(body).toBe('stream')
+  })
+
+  it('should ignore the Range header unless ranges are enabled', async () => {
+    send.mockResolvedValue(fakeObject())
+    const event = fakeEvent({ range: 'bytes=0-99' })
+
+    await proxyS3Path(event as any, 'QAQC_plots/plot.png')
+
+    expect(send.mock.calls[0][0].input.Range).toBeUndefined()
+    expect(event.status).toBeUndefined()
+    expect(event.responseHeaders['Accept-Ranges']).toBeUndefined()
+  })
+})
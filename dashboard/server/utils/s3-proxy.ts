@@ -2,7 +2,12 @@ import type { GetObjectCommandOutput } from '@aws-sdk/client-s3'
 import { GetObjectCommand, HeadObjectCommand } from '@aws-sdk/client-s3'
 import type { H3Event } from 'h3'
 
-export async function proxyS3Path(event: H3Event, path: string) {
+type ProxyOptions = {
+  // Forward `Range` headers so that clients can fetch parts of an object.
+  ranges?: boolean
+}
+
+export async function proxyS3Path(event: H3Event, path: string, options: ProxyOptions = {}) {
   if (event.method !== 'GET' && event.method !== 'HEAD') {
     return undefined
   }
@@ -14,14 +19,28 @@ export async function proxyS3Path(event: H3Event, path: string) {
       IfNoneMatch: ifNoneMatch || undefined,
       IfModifiedSince: ifModifiedSince ? new Date(ifModifiedSince) : undefined,
     }
+    const range = options.ranges ? getHeader(event, 'range') : undefined
 
     const command =
       event.method === 'HEAD'
         ? new HeadObjectCommand({ Bucket: QAQC_AWS_S3_BUCKET, Key: path, ...conditionalHeaders })
-        : new GetObjectCommand({ Bucket: QAQC_AWS_S3_BUCKET, Key: path, ...conditionalHeaders })
+        : new GetObjectCommand({
+            Bucket: QAQC_AWS_S3_BUCKET,
+            Key: path,
+            Range: range || undefined,
+            ...conditionalHeaders,
+          })
 
     const response = await s3.send(command)
 
+    if (options.ranges) {
+      setHeader(event, 'Accept-Ranges', 'bytes')
+    }
+    if (range && (response as GetObjectCommandOutput).ContentRange) {
+      setResponseStatus(event, 206)
+      setHeader(event, 'Content-Range', (response as GetObjectCommandOutput).ContentRange!)
+    }
+
     if (response.ContentType) {
       setHeader(event, 'Content-Type', response.ContentType)
     }
@@ -48,6 +67,10 @@ export async function proxyS3Path(event: H3Event, path: string) {
       throw createError({ statusCode: 404, statusMessage: 'Not found.' })
     }
 
+    if (error.name === 'InvalidRange' || error.$metadata?.httpStatusCode === 416) {
+      throw createError({ statusCode: 416, statusMessage: 'Range not satisfiable.' })
+    }
+
     if (error.name === 'NotModified' || error.$metadata?.httpStatusCode === 304) {
       setResponseStatus(event, 304)
       event.node.res.end()
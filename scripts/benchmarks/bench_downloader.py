@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Benchmark `download_rawdata.py` against a local fake archive (see `fake_archive.py`).
+
+A synthetic archive is served on a background thread and the downloader is run against it in a
+subprocess, once per engine and round, into a fresh temporary directory. Each run reports the wall
+time plus the requests, listings, files and bytes the server saw. With `--rerun` the downloader is
+run a second time into the same directory to measure an up-to-date mirror.
+
+Usage:
+    ./bench_downloader.py [--engine ENGINE]... [--rounds N] [--rerun]
+                          [--depth N] [--fan-out N] [--files N] [--file-size BYTES]
+                          [--latency SECONDS] [--error-rate FRACTION]
+                          [--bandwidth BYTES_PER_SECOND] [--gzip] [-- DOWNLOADER_ARGS...]
+
+    DOWNLOADER_ARGS  Extra options for download_rawdata.py, e.g. -- --workers 16 --compress.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from fake_archive import ArchiveServer, ArchiveShape, Faults, start_server
+
+DOWNLOAD_SCRIPT = Path(__file__).resolve().parent.parent / "download_rawdata.py"
+
+# Replaces the DEBUG-level configuration set up when `download_rawdata` is imported.
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(levelname)-8s %(message)s",
+    force=True,
+)
+log = logging.getLogger(__name__)
+
+
+def run_downloader(
+    server: ArchiveServer,
+    destination: Path,
+    engine: str,
+    extra: list[str],
+) -> tuple[int, float, dict[str, int]]:
+    """Run the downloader once and return its exit code, wall time and the server's counters."""
+    command = [
+        sys.executable,
+        str(DOWNLOAD_SCRIPT),
+        "--base-url",
+        server.base_url,
+        "--destination",
+        str(destination),
+        "--engine",
+        engine,
+        "--no-listing-cache",
+        *extra,
+    ]
+    server.reset_stats()
+    start = time.perf_counter()
+    result = subprocess.run(command, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        log.warning("Downloader exited with %d:\n%s", result.returncode, result.stderr[-2000:])
+    with server.lock:
+        stats = dict(server.stats)
+    return result.returncode, elapsed, stats
+
+
+def print_row(engine: str, run: str, elapsed: float, stats: dict[str, int]) -> None:
+    print(
+        f"{engine:<8} {run:<6} {elapsed:>9.2f} {stats['requests']:>9} {stats['listings']:>9} "
+        f"{stats['files']:>7} {stats['errors']:>7} {stats['bytes'] / 1e6:>10.2f}"
+    )
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    defaults = ArchiveShape()
+    parser = argparse.ArgumentParser(
+        description="Benchmark download_rawdata.py against a local fake archive.",
+    )
+    parser.add_argument(
+        "--engine",
+        action="append",
+        choices=("threads", "async"),
+        dest="engines",
+        help="Downloader engine to benchmark, repeatable. (default: threads)",
+    )
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Number of runs per engine. (default: 1)",
+    )
+    parser.add_argument(
+        "--rerun",
+        action="store_true",
+        help="Also time a second run into the already complete destination.",
+    )
+    parser.add_argument("--depth", type=int, default=defaults.depth, metavar="N")
+    parser.add_argument("--fan-out", type=int, default=defaults.fan_out, metavar="N")
+    parser.add_argument("--files", type=int, default=defaults.files, metavar="N")
+    parser.add_argument("--file-size", type=int, default=defaults.file_size, metavar="BYTES")
+    parser.add_argument("--latency", type=float, default=0.0, metavar="SECONDS")
+    parser.add_argument("--error-rate", type=float, default=0.0, metavar="FRACTION")
+    parser.add_argument("--bandwidth", type=float, default=None, metavar="BYTES_PER_SECOND")
+    parser.add_argument(
+        "--gzip",
+        action="store_true",
+        help="Have the server send file bodies gzip-encoded.",
+    )
+    parser.add_argument(
+        "downloader_args",
+        nargs=argparse.REMAINDER,
+        metavar="DOWNLOADER_ARGS",
+        help="Extra options for download_rawdata.py, after '--'.",
+    )
+    args = parser.parse_args(argv)
+    if args.downloader_args[:1] == ["--"]:
+        args.downloader_args = args.downloader_args[1:]
+    return args
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    shape = ArchiveShape(args.depth, args.fan_out, args.files, args.file_size)
+    faults = Faults(args.latency, args.error_rate, args.bandwidth)
+
+    server = start_server(shape, faults, gzip=args.gzip)
+    log.info("Serving %s (%s, %s)", server.base_url, shape, faults)
+
+    failures = 0
+    print(
+        f"{'engine':<8} {'run':<6} {'wall [s]':>9} {'requests':>9} {'listings':>9} "
+        f"{'files':>7} {'errors':>7} {'bytes [MB]':>10}"
+    )
+    for engine in args.engines or ["threads"]:
+        for _ in range(args.rounds):
+            with tempfile.TemporaryDirectory(prefix="bench-rawdata-") as directory:
+                destination = Path(directory)
+                returncode, elapsed, stats = run_downloader(
+                    server, destination, engine, args.downloader_args
+                )
+                failures += returncode != 0
+                print_row(engine, "cold", elapsed, stats)
+
+                if args.rerun:
+                    returncode, elapsed, stats = run_downloader(
+                        server, destination, engine, args.downloader_args
+                    )
+                    failures += returncode != 0
+                    print_row(engine, "rerun", elapsed, stats)
+
+    server.shutdown()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Compare the regex-based Apache index parser in `download_rawdata.py` against the BeautifulSoup
+fallback on saved directory listings.
+
+Both parsers are run on every fixture, their results are checked for equality and the best time
+per call over several rounds is reported.
+
+Usage:
+    ./bench_listing_parser.py [FIXTURE...] [--rounds N] [--number N]
+
+    FIXTURE  Saved listing HTML files. Defaults to every *.html file in ./fixtures/.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from download_rawdata import parse_listing_fast, parse_listing_soup  # noqa: E402
+
+FIXTURES_DIRECTORY = Path(__file__).resolve().parent / "fixtures"
+FIXTURE_URL = "https://rawdata-west.oceanobservatories.org/files/fixture/"
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(levelname)-8s %(message)s",
+)
+log = logging.getLogger(__name__)
+
+
+def best_time(function, url: str, html: str, rounds: int, number: int) -> float:
+    """Return the best time per call, in seconds, over `rounds` runs of `number` calls."""
+    timer = timeit.Timer(lambda: function(url, html))
+    return min(timer.repeat(repeat=rounds, number=number)) / number
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the Apache index page parsers used by download_rawdata.py.",
+    )
+    parser.add_argument(
+        "fixtures",
+        type=Path,
+        nargs="*",
+        metavar="FIXTURE",
+        help=f"Saved listing HTML files. (default: {FIXTURES_DIRECTORY}/*.html)",
+    )
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        default=5,
+        metavar="N",
+        help="Number of timing rounds, the best one is reported. (default: 5)",
+    )
+    parser.add_argument(
+        "--number",
+        type=int,
+        default=20,
+        metavar="N",
+        help="Number of parser calls per round. (default: 20)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+
+    fixtures: list[Path] = args.fixtures or sorted(FIXTURES_DIRECTORY.glob("*.html"))
+    if not fixtures:
+        log.error("No fixtures found.")
+        return 1
+
+    failures = 0
+    print(f"{'fixture':<28} {'entries':>7} {'fast [ms]':>10} {'soup [ms]':>10} {'speedup':>8}")
+    for fixture in fixtures:
+        html = fixture.read_text(encoding="utf-8")
+
+        fast = parse_listing_fast(FIXTURE_URL, html)
+        soup = parse_listing_soup(FIXTURE_URL, html)
+        if fast is None:
+            log.warning("'%s' is not handled by the fast parser.", fixture.name)
+            failures += 1
+            continue
+        if fast != soup:
+            log.error("Parsers disagree on '%s'.", fixture.name)
+            failures += 1
+            continue
+
+        fast_time = best_time(parse_listing_fast, FIXTURE_URL, html, args.rounds, args.number)
+        soup_time = best_time(parse_listing_soup, FIXTURE_URL, html, args.rounds, args.number)
+        entries = len(fast[0]) + len(fast[1])
+        print(
+            f"{fixture.name:<28} {entries:>7} {fast_time * 1000:>10.3f} "
+            f"{soup_time * 1000:>10.3f} {soup_time / fast_time:>7.1f}x"
+        )
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Serve a synthetic, Apache-style raw data archive over HTTP for offline benchmarking of
+`download_rawdata.py`.
+
+The tree is generated on the fly from its shape: `--depth` levels of `--fan-out` sub-directories,
+each holding `--files` files of `--file-size` bytes. Listings look like `mod_autoindex` HTMLTable
+pages, and files support ETag/Last-Modified revalidation and Range requests. Latency, server
+errors and a bandwidth cap can be injected to imitate a slow or flaky link, and `--gzip` sends file
+bodies gzip-encoded like `mod_deflate`.
+
+Usage:
+    ./fake_archive.py [--port N] [--depth N] [--fan-out N] [--files N] [--file-size BYTES]
+                      [--latency SECONDS] [--error-rate FRACTION] [--bandwidth BYTES_PER_SECOND]
+                      [--gzip]
+
+The archive root is served at http://127.0.0.1:PORT/files/ and request counters at /stats.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import random
+import re
+import sys
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import NamedTuple
+from urllib.parse import quote, unquote, urlparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from download_rawdata import format_apache_size  # noqa: E402
+
+# Replaces the DEBUG-level configuration set up when `download_rawdata` is imported.
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(levelname)-8s %(message)s",
+    force=True,
+)
+log = logging.getLogger(__name__)
+
+PREFIX = "/files/"
+# Timestamp of every entry in the archive, unless it is touched with `ArchiveServer.touch()`.
+EPOCH = 1_500_000_000
+SEND_CHUNK = 64 * 1024
+
+# Matches a single "Range: bytes=START-" or "bytes=START-END" request.
+_RANGE_RE = re.compile(r"^bytes=(\d+)-(\d*)$")
+
+
+class ArchiveShape(NamedTuple):
+    depth: int = 3
+    fan_out: int = 4
+    files: int = 10
+    file_size: int = 64 * 1024
+
+
+class Faults(NamedTuple):
+    latency: float = 0.0  # Seconds added before every response.
+    error_rate: float = 0.0  # Fraction of requests answered with a 503.
+    bandwidth: float | None = None  # Bytes per second per response.
+
+
+class ArchiveServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        shape: ArchiveShape,
+        faults: Faults,
+        gzip: bool = False,
+    ) -> None:
+        super().__init__(address, ArchiveHandler)
+        self.shape = shape
+        self.faults = faults
+        self.gzip = gzip
+        self.random = random.Random(0)
+        self.modified: dict[str, int] = {}
+        self.added: dict[str, list[str]] = {}
+        self.lock = threading.Lock()
+        self.stats: dict[str, int] = {
+            "requests": 0,
+            "listings": 0,
+            "files": 0,
+            "not_modified": 0,
+            "partial": 0,
+            "errors": 0,
+            "bytes": 0,
+        }
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{PREFIX}"
+
+    def count(self, **increments: int) -> None:
+        with self.lock:
+            for key, value in increments.items():
+                self.stats[key] += value
+
+    def reset_stats(self) -> None:
+        with self.lock:
+            for key in self.stats:
+                self.stats[key] = 0
+
+    def touch(self, relative: str, timestamp: int | None = None) -> None:
+        """Change the last-modified time of an entry and of the directory holding it."""
+        timestamp = timestamp or int(time.time())
+        with self.lock:
+            self.modified[relative] = timestamp
+            parent = relative.rstrip("/").rpartition("/")[0]
+            self.modified[f"{parent}/" if parent else ""] = timestamp
+
+    def add(self, relative: str, timestamp: int | None = None) -> None:
+        """Add a file to an existing directory, touching only that directory like Apache does."""
+        directory, _, name = relative.rpartition("/")
+        with self.lock:
+            self.added.setdefault(f"{directory}/" if directory else "", []).append(name)
+        self.touch(relative, timestamp)
+
+    def mtime(self, relative: str) -> int:
+        with self.lock:
+            return self.modified.get(relative, EPOCH)
+
+    def children(self, relative: str) -> tuple[list[str], list[str]] | None:
+        """Return the (directories, files) names in directory `relative`, or `None`."""
+        parts = [part for part in relative.split("/") if part]
+        if len(parts) > self.shape.depth or not all(
+            re.fullmatch(r"d\d{2}", part) and int(part[1:]) < self.shape.fan_out
+            for part in parts
+        ):
+            return None
+        directories = (
+            [f"d{index:02d}/" for index in range(self.shape.fan_out)]
+            if len(parts) < self.shape.depth
+            else []
+        )
+        files = [f"f{index:03d}.cnv" for index in range(self.shape.files)]
+        with self.lock:
+            files += self.added.get("".join(f"{part}/" for part in parts), [])
+        return directories, files
+
+    def is_file(self, relative: str) -> bool:
+        directory, _, name = relative.rpartition("/")
+        listing = self.children(directory)
+        return listing is not None and name in listing[1]
+
+    def content(self, relative: str) -> bytes:
+        """Deterministic contents of a file: its path hash repeated up to the file size."""
+        seed = hashlib.sha256(f"{relative}@{self.mtime(relative)}".encode()).hexdigest() + "\n"
+        repeats = self.shape.file_size // len(seed) + 1
+        return (seed * repeats).encode()[: self.shape.file_size]
+
+
+class ArchiveHandler(BaseHTTPRequestHandler):
+    server: ArchiveServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: object) -> None:
+        log.debug(format, *args)
+
+    def do_HEAD(self) -> None:
+        self.handle_request(send_body=False)
+
+    def do_GET(self) -> None:
+        self.handle_request(send_body=True)
+
+    def handle_request(self, send_body: bool) -> None:
+        server = self.server
+        path = unquote(urlparse(self.path).path)
+        server.count(requests=1)
+
+        if path == "/stats":
+            with server.lock:
+                body = json.dumps(server.stats).encode()
+            self.respond(200, body, {"Content-Type": "application/json"}, send_body)
+            return
+
+        if server.faults.latency:
+            time.sleep(server.faults.latency)
+        if server.faults.error_rate and server.random.random() < server.faults.error_rate:
+            server.count(errors=1)
+            self.respond(503, b"Service Unavailable\n", {}, send_body)
+            return
+
+        if not path.startswith(PREFIX):
+            self.respond(404, b"Not Found\n", {}, send_body)
+            return
+        relative = path[len(PREFIX) :]
+
+        if relative == "" or relative.endswith("/"):
+            listing = server.children(relative)
+            if listing is None:
+                self.respond(404, b"Not Found\n", {}, send_body)
+                return
+            server.count(listings=1)
+            validators = self.validators(relative, "listing")
+            if self.not_modified(validators):
+                return
+            body = self.render_listing(relative, *listing).encode()
+            headers = {"Content-Type": "text/html;charset=UTF-8", **validators}
+            self.respond(200, body, headers, send_body)
+            return
+
+        if not server.is_file(relative):
+            self.respond(404, b"Not Found\n", {}, send_body)
+            return
+        server.count(files=1)
+        validators = self.validators(relative, "file")
+        if self.not_modified(validators):
+            return
+
+        content = server.content(relative)
+        headers = {
+            "Content-Type": "application/octet-stream",
+            "Accept-Ranges": "bytes",
+            **validators,
+        }
+        match = _RANGE_RE.match(self.headers.get("Range", ""))
+        if_range = self.headers.get("If-Range")
+        if match and if_range in (None, validators["ETag"], validators["Last-Modified"]):
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else len(content) - 1
+            if start >= len(content):
+                headers["Content-Range"] = f"bytes */{len(content)}"
+                self.respond(416, b"", headers, send_body)
+                return
+            server.count(partial=1)
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(content)}"
+            self.respond(206, content[start : end + 1], headers, send_body)
+            return
+
+        if server.gzip and "gzip" in self.headers.get("Accept-Encoding", ""):
+            # Like mod_deflate, compress full responses only and tag the ETag of the encoded body.
+            headers["Content-Encoding"] = "gzip"
+            headers["Vary"] = "Accept-Encoding"
+            headers["ETag"] = validators["ETag"][:-1] + '-gzip"'
+            content = gzip.compress(content, mtime=0)
+        self.respond(200, content, headers, send_body)
+
+    def validators(self, relative: str, kind: str) -> dict[str, str]:
+        mtime = self.server.mtime(relative)
+        return {
+            "ETag": f'"{kind}-{hashlib.md5(f"{relative}@{mtime}".encode()).hexdigest()[:16]}"',
+            "Last-Modified": formatdate(mtime, usegmt=True),
+        }
+
+    def not_modified(self, validators: dict[str, str]) -> bool:
+        if_none_match = self.headers.get("If-None-Match")
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_none_match is not None:
+            unchanged = if_none_match == validators["ETag"]
+        elif if_modified_since is not None:
+            try:
+                unchanged = parsedate_to_datetime(if_modified_since) >= parsedate_to_datetime(
+                    validators["Last-Modified"]
+                )
+            except (TypeError, ValueError):
+                unchanged = False
+        else:
+            return False
+        if unchanged:
+            self.server.count(not_modified=1)
+            self.respond(304, b"", validators, send_body=False)
+        return unchanged
+
+    def render_listing(self, relative: str, directories: list[str], files: list[str]) -> str:
+        title = f"Index of {PREFIX}{relative}".rstrip("/")
+        rows = [
+            '<tr><td valign="top"><img src="/icons/back.gif" alt="[PARENTDIR]"></td>'
+            f'<td><a href="{PREFIX}{quote(relative.rstrip("/").rpartition("/")[0])}">'
+            'Parent Directory</a></td><td>&nbsp;</td><td align="right">  - </td>'
+            "<td>&nbsp;</td></tr>"
+        ]
+        for name in directories + files:
+            entry = relative + name
+            mtime = time.strftime("%Y-%m-%d %H:%M", time.gmtime(self.server.mtime(entry)))
+            size = "  - " if name.endswith("/") else format_apache_size(self.server.shape.file_size)
+            icon = "folder.gif" if name.endswith("/") else "unknown.gif"
+            rows.append(
+                f'<tr><td valign="top"><img src="/icons/{icon}" alt="[   ]"></td>'
+                f'<td><a href="{quote(name)}">{name}</a></td>'
+                f'<td align="right">{mtime}  </td><td align="right">{size:>4}</td>'
+                "<td>&nbsp;</td></tr>"
+            )
+        return (
+            '<!DOCTYPE HTML PUBLIC "-//W3C//DTD HTML 3.2 Final//EN">\n'
+            f"<html>\n <head>\n  <title>{title}</title>\n </head>\n <body>\n"
+            f"<h1>{title}</h1>\n  <table>\n"
+            + "\n".join(rows)
+            + "\n</table>\n</body></html>\n"
+        )
+
+    def respond(
+        self,
+        status: int,
+        body: bytes,
+        headers: dict[str, str],
+        send_body: bool,
+    ) -> None:
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not send_body or not body:
+            return
+
+        bandwidth = self.server.faults.bandwidth
+        for start in range(0, len(body), SEND_CHUNK):
+            chunk = body[start : start + SEND_CHUNK]
+            self.wfile.write(chunk)
+            if bandwidth:
+                time.sleep(len(chunk) / bandwidth)
+        self.server.count(bytes=len(body))
+
+
+def start_server(
+    shape: ArchiveShape = ArchiveShape(),
+    faults: Faults = Faults(),
+    port: int = 0,
+    gzip: bool = False,
+) -> ArchiveServer:
+    """Start an archive server on a background thread and return it (`port=0` picks any port)."""
+    server = ArchiveServer(("127.0.0.1", port), shape, faults, gzip)
+    threading.Thread(target=server.serve_forever, name="fake-archive", daemon=True).start()
+    return server
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    defaults = ArchiveShape()
+    parser = argparse.ArgumentParser(
+        description="Serve a synthetic Apache-style raw data archive for benchmarking.",
+    )
+    parser.add_argument("--port", type=int, default=8000, metavar="N", help="(default: 8000)")
+    parser.add_argument(
+        "--depth",
+        type=int,
+        default=defaults.depth,
+        metavar="N",
+        help=f"Directory levels below the root. (default: {defaults.depth})",
+    )
+    parser.add_argument(
+        "--fan-out",
+        type=int,
+        default=defaults.fan_out,
+        metavar="N",
+        help=f"Sub-directories per directory. (default: {defaults.fan_out})",
+    )
+    parser.add_argument(
+        "--files",
+        type=int,
+        default=defaults.files,
+        metavar="N",
+        help=f"Files per directory. (default: {defaults.files})",
+    )
+    parser.add_argument(
+        "--file-size",
+        type=int,
+        default=defaults.file_size,
+        metavar="BYTES",
+        help=f"Size of every file. (default: {defaults.file_size})",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        metavar="SECONDS",
+        help="Delay added before every response. (default: 0)",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        metavar="FRACTION",
+        help="Fraction of requests answered with 503 Service Unavailable. (default: 0)",
+    )
+    parser.add_argument(
+        "--bandwidth",
+        type=float,
+        default=None,
+        metavar="BYTES_PER_SECOND",
+        help="Cap on the transfer rate of each response. (default: unlimited)",
+    )
+    parser.add_argument(
+        "--gzip",
+        action="store_true",
+        help="Send full file responses gzip-encoded to clients that accept it.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    shape = ArchiveShape(args.depth, args.fan_out, args.files, args.file_size)
+    faults = Faults(args.latency, args.error_rate, args.bandwidth)
+
+    server = ArchiveServer(("127.0.0.1", args.port), shape, faults, args.gzip)
+    log.info("Serving %s (%s, %s)", server.base_url, shape, faults)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,22 @@
 #!/usr/bin/env python3
 """
 Parse all Sea-Bird *.cnv profile files under a given root directory and emit a single CSV/JSON file
-where every line/array element represents one CTD scan.
+where every line/array element represents one CTD scan. Gzip-compressed *.cnv.gz files are read too.
 
 The Station for each sample is resolved by matching the CTD file key embedded in each .cnv
 filename (e.g. "TN326_CTD-001") against the "CTD File" column of the summary samples CSV
 supplied via `--summary-samples`.
 
 Usage:
-    ./collect_discrete_ctd_cast_samples.py ROOT --summary-samples SUMMARY_CSV [--out FILE] [--format {csv,json}] [--indent N] [--verbose]
+    ./collect_discrete_ctd_cast_samples.py ROOT --summary-samples SUMMARY_CSV [--out FILE]
+                                         [--format {csv,json,parquet,arrow}] [--indent N]
+                                         [--downsample-casts N | --levels LEVELS]
+                                         [--layout {expanded,normalized}]
+                                         [--shard-by {station,cruise}] [--index] [--catalog]
+                                         [--jobs N] [--cache DIRECTORY] [--verbose]
 
-The output format is inferred from the extension of `--out` when it is ".csv" or ".json".
+The output format is inferred from the extension of `--out` when it is ".csv", ".json", ".parquet"
+or ".arrow". The Parquet and Arrow IPC formats require pyarrow.
 
 If the extension is unrecognised, `--format` is used instead (default: csv).
 """
@@ -19,15 +25,29 @@ from __future__ import annotations
 
 import argparse
 import csv
+import gzip
+import hashlib
+import io
 import json
 import logging
+import os
 import re
 import sys
-from collections.abc import Iterator
+import tempfile
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
 from csv import DictWriter
+from datetime import datetime
+from itertools import chain, islice
 from pathlib import Path
+from statistics import median
 from textwrap import dedent
-from typing import Any
+from typing import Any, NamedTuple, TextIO
+
+import numpy as np
+
+from discrete_output import ShardExtent, column_array, parse_utc_time, shard_path
 
 logging.basicConfig(
     level=logging.INFO,
@@ -70,9 +90,62 @@ _STATION_OFFSET_RE = re.compile(r"\s+-\s+\d+\s+m\b.*$")
 # Matches the cruise portion and CTD portion of a CTD file key, separated by "_" or "-".
 _CTD_FILE_KEY_RE = re.compile(r"^(.+?)[-_](CTD-.+)$", re.IGNORECASE)
 
+# Output columns whose ranges are reported for each `--shard-by` shard.
+DEPTH_COLUMN = COLUMN_MAP["depsm"]
+TIME_COLUMN = "Start Time [UTC]"
+
+# Header metadata written to the `--catalog` for each cast.
+CATALOG_META_COLUMNS: list[str] = [
+    "Cruise",
+    "Cast",
+    "Start Time [UTC]",
+    COLUMN_MAP["latitude"],
+    COLUMN_MAP["longitude"],
+    "CTD Cast Water Depth [m]",
+]
+
+# Non-blank data lines whose median size is used to estimate the number of scans in the `--catalog`.
+CATALOG_SAMPLE_LINES = 16
+
+# Columns of the `--catalog`.
+CATALOG_COLUMNS: list[str] = [
+    "Station",
+    "Target Asset",
+    "CTD File",
+    *CATALOG_META_COLUMNS,
+    "Columns",
+    "Estimated Scan Count",
+    "File Size [bytes]",
+    "Source File",
+]
+
+# Columns an `--index` output is sorted and indexed by, those present, before `TIME_COLUMN`.
+INDEX_COLUMNS: list[str] = ["Station", "Target Asset"]
+
+# Rows an `--index` output buffers before appending them to the spool file of their key.
+INDEX_SPOOL_ROWS = 10_000
+
 # Regex for parsing "# name N = shortName: Description [units]" lines.
 _CNV_NAME_RE = re.compile(r"^#\s*name\s+(\d+)\s*=\s*(\S+)\s*:")
 
+# Regex for the "# nvalues = N" line giving the number of scans.
+_CNV_NVALUES_RE = re.compile(r"^#\s*nvalues\s*=\s*(\d+)")
+
+# Output formats written with pyarrow, also the extensions of `--out` they are inferred from.
+TABLE_FORMATS: tuple[str, ...] = ("parquet", "arrow")
+
+# `--shard-by` choices → the column whose values name the shards.
+SHARD_COLUMNS: dict[str, str] = {
+    "station": "Station",
+    "cruise": "Cruise",
+}
+
+# Number of data lines of a .cnv file parsed at a time.
+ROW_CHUNK = 4096
+
+# Number of files each `--jobs` worker may parse ahead of the output being written.
+JOBS_PREFETCH = 2
+
 # Month abbreviations used when parsing date strings.
 MONTHS = {
     name: number
@@ -133,11 +206,64 @@ META_REGEX = re.compile(r"^\*\*\s+([A-Za-z ]+?):\s*(.*?)\s*$")
 SYS_REGEX = re.compile(r"^\*\s+([A-Za-z /()]+?)\s*=\s*(.*?)\s*$")
 
 
+def source_stem(path: Path) -> str:
+    """Return the name of a .cnv or .cnv.gz file without its extensions."""
+    name = path.name[:-3] if path.suffix.lower() == ".gz" else path.name
+    return Path(name).stem
+
+
+def open_source(path: Path) -> TextIO:
+    """Open a .cnv file as text, decompressing it on the fly if it is gzip-compressed."""
+    if path.suffix.lower() == ".gz":
+        return gzip.open(path, "rt", encoding="latin-1")
+    return path.open(encoding="latin-1")
+
+
+def find_source_files(root: Path) -> list[Path]:
+    """
+    Return all *.cnv and *.cnv.gz files under `root`, ordered by their uncompressed path. When a
+    file is present both plain and compressed, the more recently modified copy is used.
+    """
+    found: dict[Path, Path] = {}
+    for path in chain(root.rglob("*.cnv"), root.rglob("*.cnv.gz")):
+        key = path.with_name(path.name[:-3]) if path.suffix == ".gz" else path
+        current = found.get(key)
+        if current is None or path.stat().st_mtime > current.stat().st_mtime:
+            found[key] = path
+    return [found[key] for key in sorted(found)]
+
+
+def assets_table_path(output: Path) -> Path:
+    """Return the path of the asset table written next to `output` in the normalized layout."""
+    return output.with_name(f"{output.stem}-assets{output.suffix}")
+
+
+def load_sample_assets(summary_path: Path) -> dict[str, list[str]]:
+    """
+    Read the asset table of a summary samples CSV written with `--layout normalized` and return
+    the "Target Asset" values of each "Sample ID".
+    """
+    table_path = assets_table_path(summary_path)
+    try:
+        text = table_path.read_text(encoding="utf-8")
+    except OSError as exc:
+        log.error("Cannot read summary asset table %s: %s", table_path, exc)
+        return {}
+
+    assets: dict[str, list[str]] = {}
+    for row in csv.DictReader(text.splitlines()):
+        asset = (row.get("Target Asset") or "").strip()
+        if asset:
+            assets.setdefault((row.get("Sample ID") or "").strip(), []).append(asset)
+    return assets
+
+
 def load_ctd_file_lookup(summary_path: Path) -> dict[str, tuple[str, list[str]]]:
     """
     Read the summary samples CSV and return a mapping from "CTD File" value (e.g. "TN326_CTD-001")
     to a (station, assets) tuple, where assets is the ordered list of unique "Target Asset" values
-    associated with that CTD file.
+    associated with that CTD file. A summary in the normalized layout has its assets read from the
+    asset table next to it.
     """
     try:
         text = summary_path.read_text(encoding="utf-8")
@@ -147,16 +273,24 @@ def load_ctd_file_lookup(summary_path: Path) -> dict[str, tuple[str, list[str]]]
 
     mapping: dict[str, tuple[str, list[str]]] = {}
     reader = csv.DictReader(text.splitlines())
+    fieldnames = reader.fieldnames or []
+    sample_assets: dict[str, list[str]] | None = None
+    if "Target Asset" not in fieldnames and "Sample ID" in fieldnames:
+        sample_assets = load_sample_assets(summary_path)
     for row in reader:
         ctd_file = normalize_ctd_file_key((row.get("CTD File") or "").strip())
         station = (row.get("Station") or "").strip()
-        asset = (row.get("Target Asset") or "").strip()
+        if sample_assets is None:
+            assets = [(row.get("Target Asset") or "").strip()]
+        else:
+            assets = sample_assets.get((row.get("Sample ID") or "").strip(), [])
         if not ctd_file or not station:
             continue
         if ctd_file not in mapping:
             mapping[ctd_file] = (station, [])
-        if asset and asset not in mapping[ctd_file][1]:
-            mapping[ctd_file][1].append(asset)
+        for asset in assets:
+            if asset and asset not in mapping[ctd_file][1]:
+                mapping[ctd_file][1].append(asset)
 
     log.info(
         "Loaded %d CTD file → station/asset mappings from '%s'.",
@@ -171,7 +305,7 @@ def parse_nmea_utc(value: str) -> str | None:
     Convert an NMEA UTC header string like "Jul 06 2015 15:59:45" to an ISO-8601 UTC string. Returns
     `None` on failure.
     """
-    from datetime import datetime, timezone
+    from datetime import timezone
 
     try:
         parts = value.split()
@@ -215,12 +349,420 @@ def column_name_for(short_name: str) -> str:
     return COLUMN_MAP.get(short_name.lower(), short_name)
 
 
-def coerce_number(value: str) -> float | str:
-    """Try to parse `value` as float; return the original string on failure."""
+class DataBlock(NamedTuple):
+    """A chunk of the data rows of a .cnv file, restricted to the selected columns."""
+
+    values: np.ndarray  # float64 (row, column), NaN where a cell is not a number
+    text: dict[tuple[int, int], str]  # Cells that are not numbers, by (row, column)
+
+    def rows(self) -> list[list[float | str]]:
+        """Return every row as a list of floats, with non-numeric cells as their original text."""
+        rows: list[list[float | str]] = self.values.tolist()
+        for (row, column), value in self.text.items():
+            rows[row][column] = value
+        return rows
+
+    def row(self, index: int) -> list[float | str]:
+        """Return a single row, with non-numeric cells as their original text."""
+        row: list[float | str] = self.values[index].tolist()
+        if self.text:
+            for column in range(len(row)):
+                value = self.text.get((index, column))
+                if value is not None:
+                    row[column] = value
+        return row
+
+    def numeric(self) -> np.ndarray:
+        """Return a boolean array that is False for the cells that are not numbers."""
+        mask = np.ones(self.values.shape, dtype=bool)
+        for row, column in self.text:
+            mask[row, column] = False
+        return mask
+
+
+class BinAverager:
+    """
+    Running averages of the rows assigned to each of `bins` bins, fed one `DataBlock` at a time so
+    that memory use depends on the number of bins rather than of rows.
+
+    Sums are compensated exactly as the built-in `sum()` does, so each average is the one `sum()`
+    over the bin's rows in order would give. Non-numeric cells are left out, and a column with no
+    numeric cell in a bin keeps the text of the bin's first row.
+    """
+
+    def __init__(self, bins: int, width: int) -> None:
+        self.sums = np.zeros((bins, width))
+        self.compensations = np.zeros((bins, width))
+        self.counts = np.zeros((bins, width), dtype=np.int64)
+        self.first_rows: dict[int, list[float | str]] = {}
+
+    def add(self, block: DataBlock, rows: np.ndarray, bins: np.ndarray) -> None:
+        """Add the rows `rows` of `block` to the bins `bins`, in row order within each bin."""
+        if not len(rows):
+            return
+        order = np.argsort(bins, kind="stable")
+        rows = rows[order]
+        bins = bins[order]
+        numeric = block.numeric()[rows]
+        values = block.values[rows]
+        # Adding 0.0 leaves a sum unchanged, so non-numeric cells only need leaving out of the
+        # counts.
+        values[~numeric] = 0.0
+
+        run_starts = np.flatnonzero(np.concatenate(([True], bins[1:] != bins[:-1])))
+        run_ends = np.append(run_starts[1:], len(bins))
+        self.counts[bins[run_starts]] += np.add.reduceat(numeric, run_starts, axis=0)
+        # `sum()` keeps a plain running sum plus a running sum of the rounding error of each
+        # addition. Both are sequential, as `np.cumsum` is, and the rounding errors are computed
+        # exactly with TwoSum rather than with the branches of `sum()`.
+        with np.errstate(invalid="ignore", over="ignore"):
+            for start, end in zip(run_starts.tolist(), run_ends.tolist()):
+                bin_index = int(bins[start])
+                self.first_rows.setdefault(bin_index, block.row(int(rows[start])))
+                run = values[start:end]
+                sums = np.empty((len(run) + 1, run.shape[1]))
+                sums[0] = self.sums[bin_index]
+                sums[1:] = run
+                np.cumsum(sums, axis=0, out=sums)
+                previous = sums[:-1]
+                totals = sums[1:]
+                delta = totals - previous
+                errors = np.empty_like(sums)
+                errors[0] = self.compensations[bin_index]
+                errors[1:] = (previous - (totals - delta)) + (run - delta)
+                np.cumsum(errors, axis=0, out=errors)
+                self.sums[bin_index] = sums[-1]
+                self.compensations[bin_index] = errors[-1]
+
+    def averages(self) -> list[list[float | str]]:
+        """Return the average row of each bin that received rows, in bin order."""
+        bins = sorted(self.first_rows)
+        sums = self.sums[bins]
+        compensations = self.compensations[bins]
+        counts = self.counts[bins]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            compensated = (compensations != 0) & np.isfinite(compensations)
+            sums[compensated] += compensations[compensated]
+            rows: list[list[float | str]] = (sums / counts).tolist()
+        for position, column in np.argwhere(counts == 0).tolist():
+            rows[position][column] = self.first_rows[bins[position]][column]
+        return rows
+
+
+class DepthPicker:
+    """
+    Picks the row nearest to each of `targets`, fed one `DataBlock` at a time: the shallowest row
+    at or below the target depth, the earliest of equally deep ones. A target below every row gets
+    the deepest row, the latest of equally deep ones.
+    """
+
+    def __init__(self, targets: np.ndarray) -> None:
+        self.targets = targets
+        self.depths = np.full(len(targets), np.inf)
+        self.indices = np.full(len(targets), -1, dtype=np.int64)
+        self.rows: dict[int, list[float | str]] = {}
+        self.deepest: tuple[float, int] | None = None
+
+    def add(self, block: DataBlock, offset: int, rows: np.ndarray, depths: np.ndarray) -> None:
+        """Consider the rows `rows` of `block`, which starts at row `offset`, at `depths`."""
+        if not len(rows):
+            return
+        order = np.argsort(depths, kind="stable")
+        sorted_depths = depths[order]
+        positions = np.searchsorted(sorted_depths, self.targets, side="left")
+        found = np.flatnonzero(positions < len(sorted_depths))
+        candidates = sorted_depths[positions[found]]
+        better = found[candidates < self.depths[found]]
+        chosen = rows[order[positions[better]]]
+        self.depths[better] = sorted_depths[positions[better]]
+        self.indices[better] = offset + chosen
+
+        deepest = float(sorted_depths[-1])
+        if self.deepest is None or deepest >= self.deepest[0]:
+            self.deepest = (deepest, offset + int(rows[order[-1]]))
+            self.rows[self.deepest[1]] = block.row(int(rows[order[-1]]))
+        for index, row in zip((offset + chosen).tolist(), chosen.tolist()):
+            self.rows[index] = block.row(row)
+        # Drop the rows no target points at any more.
+        keep = set(self.indices.tolist()) | {self.deepest[1]}
+        self.rows = {index: row for index, row in self.rows.items() if index in keep}
+
+    def picks(self) -> list[list[float | str]]:
+        """Return the picked rows in target order, without repeating a row for adjacent targets."""
+        if self.deepest is None:
+            return []
+        picked: list[list[float | str]] = []
+        previous = None
+        for index in self.indices.tolist():
+            if index < 0:
+                index = self.deepest[1]
+            if index != previous:
+                picked.append(self.rows[index])
+                previous = index
+        return picked
+
+
+class RowPicker:
+    """Picks the rows at the (sorted) row `indices`, fed one `DataBlock` at a time."""
+
+    def __init__(self, indices: list[int]) -> None:
+        self.indices = indices
+        self.position = 0
+        self.rows: list[list[float | str]] = []
+
+    def add(self, block: DataBlock, offset: int, rows: np.ndarray, depths: np.ndarray) -> None:
+        """Consider `block`, which starts at row `offset`. The depths of its rows are not used."""
+        end = offset + len(block.values)
+        while self.position < len(self.indices) and self.indices[self.position] < end:
+            self.rows.append(block.row(self.indices[self.position] - offset))
+            self.position += 1
+
+    def picks(self) -> list[list[float | str]]:
+        return self.rows
+
+
+class LevelSelector(NamedTuple):
+    """
+    How one downsampling level selects its rows from a cast. `add(block, offset, rows, depths)` is
+    called with each `DataBlock` in turn, the row it starts at, and its rows with a valid depth
+    along with those depths. `picks()` then returns the selected rows.
+    """
+
+    add: Callable[[DataBlock, int, np.ndarray, np.ndarray], None]
+    picks: Callable[[], list[list[float | str]]]
+
+
+def level_selector(
+    downsample: int,
+    row_count: int,
+    depth_range: tuple[float, float] | None,
+    width: int,
+    downsample_select: str,
+) -> LevelSelector | None:
+    """
+    Return how a cast of `row_count` (more than `downsample`) rows of `width` columns is downsampled
+    to at most `downsample` rows: along the `depth_range` of its rows if given, else along the row
+    index. Returns None if no row can be selected because no row has a valid depth.
+    """
+    step = row_count / downsample
+    starts = (np.arange(downsample) * step).astype(np.int64)
+
+    if depth_range is not None:
+        min_depth, max_depth = depth_range
+        if min_depth > max_depth:
+            # No row has a valid depth.
+            return None
+
+        if max_depth > min_depth:
+            bin_size = (max_depth - min_depth) / downsample
+            if downsample_select == "average":
+                # Assign each row to a depth bin, then average each non-empty bin.
+                averager = BinAverager(downsample, width)
+
+                def add_by_depth(
+                    block: DataBlock, offset: int, rows: np.ndarray, depths: np.ndarray
+                ) -> None:
+                    bins = np.minimum(
+                        ((depths - min_depth) / bin_size).astype(np.int64), downsample - 1
+                    )
+                    averager.add(block, rows, bins)
+
+                return LevelSelector(add_by_depth, averager.averages)
+
+            # If "first", pick the nearest row to each target depth.
+            picker = DepthPicker(min_depth + np.arange(downsample) * bin_size)
+            return LevelSelector(picker.add, picker.picks)
+
+        # All depths identical: just take evenly-spaced indices (below).
+
+    elif downsample_select == "average":
+        # Time-based: average the rows between evenly-spaced indices. Rows past the end of the
+        # last bin, if rounding leaves any, are left out.
+        end = int(downsample * step)
+        averager = BinAverager(downsample, width)
+
+        def add_by_time(
+            block: DataBlock, offset: int, rows: np.ndarray, depths: np.ndarray
+        ) -> None:
+            rows = np.arange(min(max(end - offset, 0), len(block.values)))
+            bins = np.searchsorted(starts, offset + rows, side="right") - 1
+            averager.add(block, rows, bins)
+
+        return LevelSelector(add_by_time, averager.averages)
+
+    # Time-based (or constant depth), evenly-spaced row indices.
+    row_picker = RowPicker(starts.tolist())
+    return LevelSelector(row_picker.add, row_picker.picks)
+
+
+def count_data_lines(file: TextIO, max_column: int) -> int:
+    """Count the rest of the data lines of `file` that have a field at index `max_column`."""
+    return sum(1 for line in file if len(line.split()) > max_column)
+
+
+def has_data_line(file: TextIO, max_column: int) -> bool:
+    """Return True if the rest of `file` has a data line with a field at index `max_column`."""
+    return any(len(line.split()) > max_column for line in file)
+
+
+def read_data_blocks(file: TextIO, columns: list[int]) -> Iterator[DataBlock]:
+    """
+    Read the rest of `file` (the data block after "*END*") in chunks of `ROW_CHUNK` lines, each
+    parsed into a float array with one column for each index in `columns`.
+    """
+    while lines := list(islice(file, ROW_CHUNK)):
+        yield parse_data_lines(lines, columns)
+
+
+def load_data_lines(lines: list[str], columns: list[int]) -> np.ndarray:
+    """Parse complete, numeric data lines into a float array. Raises `ValueError` otherwise."""
+    return np.loadtxt(
+        io.StringIO("".join(lines)), dtype=np.float64, comments=None, usecols=columns, ndmin=2
+    )
+
+
+def parse_data_lines(lines: list[str], columns: list[int]) -> DataBlock:
+    """
+    Parse data lines of a .cnv file into a `DataBlock`. Lines with too few fields are skipped.
+
+    The lines are parsed with one `np.loadtxt` call when every row is complete and numeric.
+    Otherwise the incomplete rows are dropped and the rest parsed again, and only if a selected
+    cell is still not a number are the cells converted one by one.
+    """
+    if not "".join(lines).strip():
+        return DataBlock(np.empty((0, len(columns))), {})
     try:
-        return float(value)
+        return DataBlock(load_data_lines(lines, columns), {})
     except ValueError:
-        return value
+        pass
+
+    max_column = max(columns)
+    lines = [line for line in lines if len(line.split()) > max_column]
+    if not lines:
+        return DataBlock(np.empty((0, len(columns))), {})
+    try:
+        return DataBlock(load_data_lines(lines, columns), {})
+    except ValueError:
+        pass
+
+    values = np.empty((len(lines), len(columns)))
+    cells: dict[tuple[int, int], str] = {}
+    for row_index, line in enumerate(lines):
+        tokens = line.split()
+        for position, column in enumerate(columns):
+            try:
+                values[row_index, position] = float(tokens[column])
+            except ValueError:
+                values[row_index, position] = np.nan
+                cells[row_index, position] = tokens[column]
+    return DataBlock(values, cells)
+
+
+class CastHeader(NamedTuple):
+    """Metadata and selected columns read from the header of a .cnv file."""
+
+    meta: dict[str, Any]
+    columns: dict[int, str]  # Output column name by data column index
+    scans: int | None = None  # Number of data rows given by "# nvalues", if any
+
+
+def ctd_file_key(stem: str) -> str:
+    """Return the normalized CTD file key of the cast file with stem `stem`."""
+    return normalize_ctd_file_key(stem.split("__")[-1])
+
+
+def resolve_station(
+    stem: str,
+    ctd_file_lookup: dict[str, tuple[str, list[str]]],
+) -> tuple[str, list[str]] | None:
+    """Return the (station, assets) of the cast file with stem `stem`, or None if unknown."""
+    lookup = ctd_file_lookup.get(ctd_file_key(stem))
+    if lookup is None:
+        return None
+    return _STATION_OFFSET_RE.sub("", lookup[0]).strip(), lookup[1]
+
+
+def read_header(file: TextIO, stem: str) -> CastHeader | None:
+    """
+    Read the header of an open .cnv file up to and including the "*END*" line, leaving `file` at
+    the first data line. Returns None if there is no "*END*" line or no usable column.
+    """
+    # Extract the cast number from the filename (e.g. "TN326_CTD-018" -> "18").
+    meta: dict[str, Any] = {}
+    file_key_match = _CTD_FILE_KEY_RE.match(stem.split("__")[-1])
+    if file_key_match:
+        filename_cast = normalize_cast(file_key_match.group(2))
+        if filename_cast:
+            meta["Cast"] = filename_cast
+
+    # Parse header: metadata and column definitions (line by line).
+    # Use readline() so the data block can be read in one go once "*END*" is reached.
+    columns: dict[int, str] = {}
+    scans: int | None = None
+    found_end = False
+
+    while True:
+        line = file.readline()
+        if not line:
+            break
+        if line.strip() == "*END*":
+            found_end = True
+            break
+
+        name_match = _CNV_NAME_RE.match(line)
+        if name_match:
+            column_index = int(name_match.group(1))
+            short_name = name_match.group(2)
+            if not any(short in short_name.lower() for short in COLUMN_IGNORE):
+                columns[column_index] = column_name_for(short_name)
+            continue
+
+        nvalues_match = _CNV_NVALUES_RE.match(line)
+        if nvalues_match:
+            scans = int(nvalues_match.group(1))
+            continue
+
+        user_comment_match = META_REGEX.match(line)
+        if user_comment_match:
+            raw_key = re.sub(
+                r"\s+", "_", user_comment_match.group(1).strip().lower()
+            )
+            value = user_comment_match.group(2).strip()
+            if value:
+                csv_key = META_KEY_TO_COLUMN_MAP.get(raw_key)
+                if csv_key and csv_key not in meta:
+                    meta[csv_key] = (
+                        normalize_cast(value) if csv_key == "Cast" else value
+                    )
+            continue
+
+        sys_header_match = SYS_REGEX.match(line)
+        if sys_header_match:
+            raw_key = sys_header_match.group(1).strip().lower()
+            value = sys_header_match.group(2).strip()
+            if "nmea latitude" in raw_key:
+                lat_column = COLUMN_MAP.get("latitude")
+                if lat_column and lat_column not in meta:
+                    parsed = parse_nmea_coordinates(value)
+                    if parsed is not None:
+                        meta[lat_column] = str(parsed)
+            elif "nmea longitude" in raw_key:
+                lon_column = COLUMN_MAP.get("longitude")
+                if lon_column and lon_column not in meta:
+                    parsed = parse_nmea_coordinates(value)
+                    if parsed is not None:
+                        meta[lon_column] = str(parsed)
+            elif "nmea utc" in raw_key:
+                if "Start Time [UTC]" not in meta:
+                    iso_time = parse_nmea_utc(value)
+                    meta["Start Time [UTC]"] = (
+                        iso_time if iso_time is not None else value
+                    )
+            continue
+
+    if not found_end or not columns:
+        return None
+    return CastHeader(meta, columns, scans)
 
 
 def parse(
@@ -229,111 +771,66 @@ def parse(
     downsample: int | None = None,
     downsample_by: str = "depth",
     downsample_select: str = "average",
+    layout: str = "expanded",
 ) -> Iterator[dict[str, Any]]:
-    """Parse a single .cnv file and yield sample dicts."""
-    ctd_file_key = normalize_ctd_file_key(path.stem.split("__")[-1])
-    lookup = ctd_file_lookup.get(ctd_file_key)
-    if lookup is not None:
-        station = _STATION_OFFSET_RE.sub("", lookup[0]).strip()
-        assets = lookup[1]
-    else:
-        station = None
-        assets = []
-    if station is None:
+    """
+    Parse a single .cnv (or .cnv.gz) file and yield sample dicts. With the "expanded" `layout`
+    each scan is yielded once per target asset, with the "normalized" one it is yielded once with
+    the cast's "CTD File" key instead.
+    """
+    for _, sample in parse_levels(
+        path, ctd_file_lookup, [downsample], downsample_by, downsample_select, layout
+    ):
+        yield sample
+
+
+def parse_levels(
+    path: Path,
+    ctd_file_lookup: dict[str, tuple[str, list[str]]],
+    levels: list[int | None],
+    downsample_by: str = "depth",
+    downsample_select: str = "average",
+    layout: str = "expanded",
+) -> Iterator[tuple[int, dict[str, Any]]]:
+    """
+    Like `parse()`, but downsample to each of `levels` (None keeps every scan) at once and yield
+    (position in `levels`, sample) tuples. The data rows are read at most twice however many
+    levels there are: once for their number and depth range, once to select from.
+    """
+    stem = source_stem(path)
+    resolved = resolve_station(stem, ctd_file_lookup)
+    if resolved is None:
         log.warning(
             "No station found in summary for CTD file %r (%s), skipping.",
-            ctd_file_key,
+            ctd_file_key(stem),
             path,
         )
         return
+    station, assets = resolved
 
     try:
-        file = path.open(encoding="latin-1")
+        file = open_source(path)
     except OSError as exc:
         log.error("Cannot read %s: %s", path, exc)
         return
 
-    # Extract the cast number from the filename (e.g. "TN326_CTD-018" -> "18").
-    filename_cast = ""
-    file_key_match = _CTD_FILE_KEY_RE.match(path.stem.split("__")[-1])
-    if file_key_match:
-        filename_cast = normalize_cast(file_key_match.group(2))
-
     with file:
-        # Parse header: metadata and column definitions (line by line).
-        # Use readline() instead of iteration so that tell()/seek() work later.
-        meta: dict[str, Any] = {}
-        if filename_cast:
-            meta["Cast"] = filename_cast
-        columns: dict[int, str] = {}
-        found_end = False
-
-        while True:
-            line = file.readline()
-            if not line:
-                break
-            if line.strip() == "*END*":
-                found_end = True
-                break
-
-            name_match = _CNV_NAME_RE.match(line)
-            if name_match:
-                column_index = int(name_match.group(1))
-                short_name = name_match.group(2)
-                if not any(short in short_name.lower() for short in COLUMN_IGNORE):
-                    columns[column_index] = column_name_for(short_name)
-                continue
-
-            user_comment_match = META_REGEX.match(line)
-            if user_comment_match:
-                raw_key = re.sub(
-                    r"\s+", "_", user_comment_match.group(1).strip().lower()
-                )
-                value = user_comment_match.group(2).strip()
-                if value:
-                    csv_key = META_KEY_TO_COLUMN_MAP.get(raw_key)
-                    if csv_key and csv_key not in meta:
-                        meta[csv_key] = (
-                            normalize_cast(value) if csv_key == "Cast" else value
-                        )
-                continue
-
-            sys_header_match = SYS_REGEX.match(line)
-            if sys_header_match:
-                raw_key = sys_header_match.group(1).strip().lower()
-                value = sys_header_match.group(2).strip()
-                if "nmea latitude" in raw_key:
-                    lat_column = COLUMN_MAP.get("latitude")
-                    if lat_column and lat_column not in meta:
-                        parsed = parse_nmea_coordinates(value)
-                        if parsed is not None:
-                            meta[lat_column] = str(parsed)
-                elif "nmea longitude" in raw_key:
-                    lon_column = COLUMN_MAP.get("longitude")
-                    if lon_column and lon_column not in meta:
-                        parsed = parse_nmea_coordinates(value)
-                        if parsed is not None:
-                            meta[lon_column] = str(parsed)
-                elif "nmea utc" in raw_key:
-                    if "Start Time [UTC]" not in meta:
-                        iso_time = parse_nmea_utc(value)
-                        meta["Start Time [UTC]"] = (
-                            iso_time if iso_time is not None else value
-                        )
-                continue
-
-        if not found_end or not columns:
+        header = read_header(file, stem)
+        if header is None:
             log.warning("No data header or columns found in %s, skipping.", path)
             return
+        meta, columns = header.meta, header.columns
 
-        max_column = max(columns.keys())
+        blocks = read_data_blocks(file, list(columns))
+        names = list(columns.values())
+        downsampled = any(level is not None for level in levels)
 
-        # Find the depth column index for depth-based downsampling.
+        # Find the depth column for depth-based downsampling.
         depth_column: int | None = None
-        if downsample is not None and downsample_by == "depth":
-            for column_index, column_name in columns.items():
+        if downsampled and downsample_by == "depth":
+            for position, column_name in enumerate(names):
                 if column_name == COLUMN_MAP.get("depsm"):
-                    depth_column = column_index
+                    depth_column = position
                     break
             if depth_column is None:
                 log.warning(
@@ -341,207 +838,651 @@ def parse(
                     path,
                 )
 
-        # Helper: read all data rows as parsed token lists.
-        def read_all_rows() -> list[list[str]]:
-            rows: list[list[str]] = []
-            while True:
-                line = file.readline()
-                if not line:
-                    break
-                line = line.strip()
-                if not line:
-                    continue
-                tokens = line.split()
-                if len(tokens) > max_column:
-                    rows.append(tokens)
-            return rows
-
-        # Helper: build a sample dict from a token list.
-        def make_sample(tokens: list[str]) -> dict[str, Any]:
-            sample: dict[str, Any] = {
-                "Station": station,
-                "Target Asset": None,
-                **meta,
-            }
-            for column_index, column_name in columns.items():
-                sample[column_name] = coerce_number(tokens[column_index])
+        # Helper: build a sample dict from a row of cells.
+        if layout == "normalized":
+            base: dict[str, Any] = {"Station": station, "CTD File": ctd_file_key(stem), **meta}
+        else:
+            base = {"Station": station, "Target Asset": None, **meta}
+
+        def make_sample(row: list[float | str]) -> dict[str, Any]:
+            sample = base.copy()
+            sample.update(zip(names, row))
             return sample
 
-        # Helper: average numeric columns across multiple token lists.
-        def average_tokens(group: list[list[str]]) -> list[str]:
-            result: list[str] = list(group[0])
-            for column_index in columns:
-                values: list[float] = []
-                for tokens in group:
-                    try:
-                        values.append(float(tokens[column_index]))
-                    except ValueError:
-                        pass
-                if values:
-                    result[column_index] = str(sum(values) / len(values))
-            return result
-
-        # Helper: yield sample dicts for each asset.
-        def emit(tokens: list[str]) -> Iterator[dict[str, Any]]:
-            sample = make_sample(tokens)
+        # Helper: yield the sample dicts of a row, one for each asset, or a single one if the
+        # layout is normalized.
+        def emit(row: list[float | str]) -> Iterator[dict[str, Any]]:
+            if layout == "normalized":
+                if assets:
+                    yield make_sample(row)
+                return
             for asset in assets:
-                copy = dict(sample)
-                copy["Target Asset"] = asset
-                yield copy
+                sample = make_sample(row)
+                sample["Target Asset"] = asset
+                yield sample
 
         # No downsampling: stream rows directly.
-        if downsample is None:
-            while True:
+        if not downsampled:
+            for block in blocks:
+                for row in block.rows():
+                    for sample in emit(row):
+                        for index in range(len(levels)):
+                            yield index, sample
+            return
+
+        # --- Downsampling path: a first pass over the data rows finds their number and depth
+        # range, a second one bins them, so memory use is bounded by the number of bins. ---
+        data_start = file.tell()
+        indices = list(columns)
+        row_count = 0
+        min_depth = np.inf
+        max_depth = -np.inf
+        if depth_column is None:
+            row_count = count_data_lines(file, max(indices))
+        else:
+            # Parse the depth column only, but also the last column so that short rows are
+            # skipped just as in the second pass.
+            scan_columns = [indices[depth_column], max(indices)]
+            for block in read_data_blocks(file, scan_columns):
+                row_count += len(block.values)
+                depths = block.values[:, 0]
+                depths = depths[block.numeric()[:, 0] & np.isfinite(depths)]
+                if len(depths):
+                    min_depth = min(min_depth, float(depths.min()))
+                    max_depth = max(max_depth, float(depths.max()))
+        if not row_count:
+            return
+
+        file.seek(data_start)
+        blocks = read_data_blocks(file, indices)
+
+        # Levels with no fewer rows than the cast emit everything, the others select rows.
+        streamed: list[int] = []
+        selectors: list[tuple[int, LevelSelector]] = []
+        depth_range = (min_depth, max_depth) if depth_column is not None else None
+        for index, level in enumerate(levels):
+            if level is None or row_count <= level:
+                streamed.append(index)
+                continue
+            selector = level_selector(level, row_count, depth_range, len(names), downsample_select)
+            if selector is not None:
+                selectors.append((index, selector))
+
+        no_rows = np.empty(0, dtype=np.int64)
+        offset = 0
+        for block in blocks:
+            if streamed:
+                for row in block.rows():
+                    for sample in emit(row):
+                        for index in streamed:
+                            yield index, sample
+            if selectors:
+                rows, depths = no_rows, no_rows.astype(float)
+                if depth_column is not None:
+                    depths = block.values[:, depth_column]
+                    rows = np.flatnonzero(block.numeric()[:, depth_column] & np.isfinite(depths))
+                    depths = depths[rows]
+                for _, selector in selectors:
+                    selector.add(block, offset, rows, depths)
+            offset += len(block.values)
+
+        for index, selector in selectors:
+            for row in selector.picks():
+                for sample in emit(row):
+                    yield index, sample
+
+
+def source_size(path: Path) -> int:
+    """
+    Return the uncompressed size of a .cnv or .cnv.gz file, the latter from its gzip trailer, which
+    holds the size modulo 4 GiB.
+    """
+    if path.suffix.lower() != ".gz":
+        return path.stat().st_size
+    with path.open("rb") as stream:
+        stream.seek(-4, os.SEEK_END)
+        return int.from_bytes(stream.read(4), "little")
+
+
+def catalog_entry(
+    path: Path,
+    ctd_file_lookup: dict[str, tuple[str, list[str]]],
+) -> dict[str, Any] | None:
+    """
+    Describe the cast in `path` from its header and size alone, without parsing its data rows.
+    The number of scans is the header's "# nvalues" if given, otherwise the size of the data
+    divided by the median size of its first `CATALOG_SAMPLE_LINES` non-blank lines. Returns None
+    if the file has no usable header.
+    """
+    stem = source_stem(path)
+    station, assets = resolve_station(stem, ctd_file_lookup) or ("", [])
+    try:
+        with open_source(path) as file:
+            header = read_header(file, stem)
+            if header is None:
+                return None
+            data_start = file.tell()
+            line_sizes: list[int] = []
+            while len(line_sizes) < CATALOG_SAMPLE_LINES:
+                line_start = file.tell()
                 line = file.readline()
                 if not line:
                     break
-                line = line.strip()
-                if not line:
-                    continue
-                tokens = line.split()
-                if len(tokens) > max_column:
-                    yield from emit(tokens)
-            return
+                if line.strip():
+                    line_sizes.append(file.tell() - line_start)
+            line_size = median(line_sizes) if line_sizes else 0
+        size = path.stat().st_size
+        scans = header.scans
+        if scans is None:
+            scans = round((source_size(path) - data_start) / line_size) if line_size else 0
+    except (OSError, EOFError) as exc:
+        log.error("Cannot read %s: %s", path, exc)
+        return None
 
-        # --- Downsampling path: read all rows into memory for this file. ---
-        all_rows = read_all_rows()
-        if not all_rows:
-            return
+    return {
+        "Station": station,
+        "Target Asset": ", ".join(assets),
+        "CTD File": ctd_file_key(stem),
+        **{column: header.meta.get(column) for column in CATALOG_META_COLUMNS},
+        "Columns": ", ".join(dict.fromkeys(header.columns.values())),
+        "Estimated Scan Count": scans,
+        "File Size [bytes]": size,
+        "Source File": path.name,
+    }
 
-        if len(all_rows) <= downsample:
-            # Fewer rows than target: emit everything.
-            for tokens in all_rows:
-                yield from emit(tokens)
-            return
 
-        if downsample_by == "depth" and depth_column is not None:
-            # Compute evenly-spaced target depths.
-            depths = []
-            for i, tokens in enumerate(all_rows):
-                try:
-                    depths.append((i, float(tokens[depth_column])))
-                except ValueError:
-                    pass
+class SampleBatch(NamedTuple):
+    """The samples parsed from one file, as rows of values under one shared tuple of keys."""
 
-            if not depths:
-                return
+    keys: tuple[str, ...]
+    rows: list[tuple[Any, ...]]
 
-            min_depth = min(d for _, d in depths)
-            max_depth = max(d for _, d in depths)
+    def samples(self) -> Iterator[dict[str, Any]]:
+        for row in self.rows:
+            yield dict(zip(self.keys, row))
 
-            if max_depth <= min_depth:
-                # All depths identical: just take evenly-spaced indices.
-                step = len(all_rows) / downsample
-                for i in range(downsample):
-                    yield from emit(all_rows[int(i * step)])
-                return
 
-            bin_size = (max_depth - min_depth) / downsample
+# Per-process state of `--jobs` workers, set by `init_worker()`.
+_worker_lookup: dict[str, tuple[str, list[str]]] = {}
+_worker_options: dict[str, Any] = {}
 
-            if downsample_select == "average":
-                # Assign each row to a depth bin, then average each bin.
-                bins: dict[int, list[list[str]]] = {}
-                for row_index, depth in depths:
-                    bin_index = min(int((depth - min_depth) / bin_size), downsample - 1)
-                    bins.setdefault(bin_index, []).append(all_rows[row_index])
-
-                for bin_index in sorted(bins):
-                    yield from emit(average_tokens(bins[bin_index]))
-            else:
-                # If "first", pick the nearest row to each target depth.
-                sorted_depths = sorted(depths, key=lambda entry: entry[1])
-                targets = [min_depth + i * bin_size for i in range(downsample)]
-                seen: set[int] = set()
-                cursor = 0
-                for target in targets:
-                    while (
-                        cursor < len(sorted_depths) - 1
-                        and sorted_depths[cursor][1] < target
-                    ):
-                        cursor += 1
-                    row_index = sorted_depths[cursor][0]
-                    if row_index not in seen:
-                        seen.add(row_index)
-                        yield from emit(all_rows[row_index])
-        else:
-            # Time-based, evenly-spaced row indices.
-            step = len(all_rows) / downsample
 
-            if downsample_select == "average":
-                for i in range(downsample):
-                    start = int(i * step)
-                    end = int((i + 1) * step)
-                    group = all_rows[start:end] or [all_rows[start]]
-                    yield from emit(average_tokens(group))
-            else:
-                for i in range(downsample):
-                    yield from emit(all_rows[int(i * step)])
+def init_worker(
+    ctd_file_lookup: dict[str, tuple[str, list[str]]],
+    options: dict[str, Any],
+    level: int,
+) -> None:
+    """Set up the state a worker process needs to run `parse_batches()`."""
+    global _worker_lookup, _worker_options
+    _worker_lookup = ctd_file_lookup
+    _worker_options = options
+    logging.getLogger().setLevel(level)
 
 
-def write_samples_as_json(
-    samples: Iterator[dict[str, Any]],
-    output: Path,
-    indent: int,
-) -> int:
-    """Stream samples to a JSON array file. Returns the number of samples written."""
-    count = 0
-    separator = ""
-    applied_indent = indent or None
+def collect_batches(
+    path: Path,
+    ctd_file_lookup: dict[str, tuple[str, list[str]]],
+    levels: list[int | None],
+    **options: Any,
+) -> list[SampleBatch]:
+    """
+    Run `parse_levels()` on `path` and collect the samples of each level into a `SampleBatch`.
+    Every sample of a file has the same keys in the same order, so they are kept once rather than
+    with each sample.
+    """
+    keys: tuple[str, ...] = ()
+    rows: list[list[tuple[Any, ...]]] = [[] for _ in levels]
+    for index, sample in parse_levels(path, ctd_file_lookup, levels, **options):
+        if not keys:
+            keys = tuple(sample)
+        rows[index].append(tuple(sample.values()))
+    return [SampleBatch(keys, level_rows) for level_rows in rows]
 
-    with output.open("w", encoding="utf-8") as stream:
-        stream.write("[\n" if applied_indent else "[")
 
-        for sample in samples:
-            stream.write(separator)
-            json.dump(sample, stream, indent=applied_indent, ensure_ascii=False)
-            separator = ",\n" if applied_indent else ","
-            count += 1
+def parse_batches(path: Path) -> list[SampleBatch]:
+    """Run `collect_batches()` on `path` in a worker process."""
+    return collect_batches(path, _worker_lookup, **_worker_options)
 
-        stream.write("\n]\n" if applied_indent else "]")
 
-    return count
+def parse_in_pool(
+    files: list[Path],
+    ctd_file_lookup: dict[str, tuple[str, list[str]]],
+    jobs: int,
+    **options: Any,
+) -> Iterator[tuple[Path, list[SampleBatch]]]:
+    """
+    Parse `files` across `jobs` worker processes and yield each file's samples in the order of
+    `files`. At most `JOBS_PREFETCH` files per worker are parsed ahead of the consumer.
+    """
+    remaining = iter(files)
+    pending: deque[tuple[Path, Future[list[SampleBatch]]]] = deque()
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=init_worker,
+        initargs=(ctd_file_lookup, options, logging.getLogger().level),
+    ) as pool:
+        for path in islice(remaining, jobs * JOBS_PREFETCH):
+            pending.append((path, pool.submit(parse_batches, path)))
+        while pending:
+            path, future = pending.popleft()
+            batches = future.result()
+            next_path = next(remaining, None)
+            if next_path is not None:
+                pending.append((next_path, pool.submit(parse_batches, next_path)))
+            yield path, batches
+
+
+class ParseCache:
+    """
+    On-disk cache of the samples parsed from each .cnv file, one JSON file per source file.
+
+    An entry is named after the source path, size and modification time, the parse options, the
+    file's station and assets from the summary lookup, and the code of this script (which covers
+    `COLUMN_MAP` and the other tables), so a change to any of them is a miss. Storing an entry
+    removes the older entries of the same file and options.
+    """
+
+    VERSION = 2
+
+    def __init__(
+        self,
+        directory: Path,
+        ctd_file_lookup: dict[str, tuple[str, list[str]]],
+        options: dict[str, Any],
+    ) -> None:
+        self.directory = directory
+        self.ctd_file_lookup = ctd_file_lookup
+        self.hits = 0
+        code = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()
+        self._fingerprint = json.dumps([self.VERSION, options, code], sort_keys=True)
+
+    def _entry_prefix(self, path: Path) -> str:
+        station = resolve_station(source_stem(path), self.ctd_file_lookup)
+        key = json.dumps([str(path.resolve()), self._fingerprint, station])
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+    def entry_path(self, path: Path) -> Path | None:
+        """Return the cache file for the current version of `path`, or None if it is unreadable."""
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return self.directory / f"{self._entry_prefix(path)}-{stat.st_size}-{stat.st_mtime_ns}.json"
+
+    def contains(self, path: Path) -> bool:
+        entry = self.entry_path(path)
+        return entry is not None and entry.exists()
+
+    def get(self, path: Path) -> list[SampleBatch] | None:
+        entry = self.entry_path(path)
+        if entry is None or not entry.exists():
+            return None
+        try:
+            data = json.loads(entry.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            log.warning("Ignoring unreadable cache entry '%s': %s", entry, exc)
+            return None
+        self.hits += 1
+        return [SampleBatch(tuple(level["keys"]), level["rows"]) for level in data["levels"]]
+
+    def store(self, path: Path, batches: list[SampleBatch]) -> None:
+        entry = self.entry_path(path)
+        if entry is None:
+            return
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp = entry.with_suffix(".part")
+            levels = [{"keys": batch.keys, "rows": batch.rows} for batch in batches]
+            tmp.write_text(json.dumps({"levels": levels}), encoding="utf-8")
+            tmp.replace(entry)
+            prefix = entry.name.split("-", 1)[0]
+            for stale in self.directory.glob(f"{prefix}-*.json"):
+                if stale != entry:
+                    stale.unlink(missing_ok=True)
+        except OSError as exc:
+            log.warning("Cannot write cache entry '%s': %s", entry, exc)
+
+
+class JsonSampleWriter:
+    """Streams samples to a JSON array file, one `write()` at a time."""
+
+    def __init__(self, output: Path, indent: int) -> None:
+        self.count = 0
+        self.indent = indent or None
+        self.separator = ""
+        self.stream = output.open("w", encoding="utf-8")
+        self.stream.write("[\n" if self.indent else "[")
+
+    def write(self, sample: dict[str, Any]) -> None:
+        self.stream.write(self.separator)
+        json.dump(sample, self.stream, indent=self.indent, ensure_ascii=False)
+        self.separator = ",\n" if self.indent else ","
+        self.count += 1
+
+    def close(self) -> int:
+        """Finish the file and return the number of samples written."""
+        self.stream.write("\n]\n" if self.indent else "]")
+        self.stream.close()
+        return self.count
 
 
 def discover_columns(
     files: list[Path],
     ctd_file_lookup: dict[str, tuple[str, list[str]]],
-    downsample: int | None = None,
-    downsample_by: str = "depth",
-    downsample_select: str = "average",
+    layout: str = "expanded",
 ) -> list[str]:
-    """Do a quick pass over all files to collect the union of all column names in order."""
-    columns: dict[str, None] = {}
+    """
+    Collect the union of all column names in order, from the headers of the files. Files that
+    `parse()` would skip for lack of a station, assets, header or complete data line are left out.
+    The data lines are only read up to the first complete one, so a cast that yields no samples
+    when downsampled by depth because none of its depths is valid still adds its columns.
+    """
+    key_column = "CTD File" if layout == "normalized" else "Target Asset"
+    columns: dict[str, None] = {"Station": None, key_column: None}
+    found = False
     for path in files:
-        for sample in parse(
-            path,
-            ctd_file_lookup,
-            downsample=downsample,
-            downsample_by=downsample_by,
-            downsample_select=downsample_select,
-        ):
-            columns.update(sample)
-            break  # Only need the first sample per file to get its columns.
-    return list(columns)
-
-
-def write_samples_as_csv(
-    samples: Iterator[dict[str, Any]],
-    output: Path,
-    columns: list[str],
-) -> int:
-    """Stream samples to a CSV file. Returns the number of samples written."""
-    count = 0
-    with output.open("w", encoding="utf-8", newline="") as stream:
-        writer = DictWriter(
-            stream,
+        stem = source_stem(path)
+        resolved = resolve_station(stem, ctd_file_lookup)
+        if resolved is None or not resolved[1]:
+            continue
+        try:
+            with open_source(path) as file:
+                header = read_header(file, stem)
+                if header is None or not has_data_line(file, max(header.columns)):
+                    continue
+        except OSError:
+            continue
+        found = True
+        columns.update(dict.fromkeys(header.meta))
+        columns.update(dict.fromkeys(header.columns.values()))
+    return list(columns) if found else []
+
+
+class CsvSampleWriter:
+    """Streams samples to a CSV file with the header `columns`, one `write()` at a time."""
+
+    def __init__(self, output: Path, columns: list[str]) -> None:
+        self.count = 0
+        self.stream = output.open("w", encoding="utf-8", newline="")
+        self.writer = DictWriter(
+            self.stream,
             fieldnames=columns,
             extrasaction="ignore",
         )
-        writer.writeheader()
-        for sample in samples:
-            writer.writerow(sample)
-            count += 1
-    return count
+        self.writer.writeheader()
+
+    def write(self, sample: dict[str, Any]) -> None:
+        self.writer.writerow(sample)
+        self.count += 1
+
+    def close(self) -> int:
+        """Finish the file and return the number of samples written."""
+        self.stream.close()
+        return self.count
+
+
+class TableSampleWriter:
+    """
+    Writes samples to a zstd-compressed Parquet or Arrow IPC ("arrow") file with one typed column
+    per name in `columns`, see `column_array()`.
+
+    The type of a column depends on all of its values, so the samples are collected column by
+    column and only written on `close()`.
+    """
+
+    def __init__(self, output: Path, columns: list[str], format: str) -> None:
+        self.count = 0
+        self.output = output
+        self.columns = columns
+        self.format = format
+        self.values: list[list[Any]] = [[] for _ in columns]
+
+    def write(self, sample: dict[str, Any]) -> None:
+        for column, column_values in zip(self.columns, self.values):
+            column_values.append(sample.get(column))
+        self.count += 1
+
+    def close(self) -> int:
+        """Write the file and return the number of samples written."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.table(
+            [column_array(column_values) for column_values in self.values], names=self.columns
+        )
+        match self.format:
+            case "parquet":
+                pq.write_table(table, self.output, compression="zstd")
+            case "arrow":
+                options = pa.ipc.IpcWriteOptions(compression="zstd")
+                with pa.ipc.new_file(self.output, table.schema, options=options) as writer:
+                    writer.write_table(table)
+        return self.count
+
+
+class IndexedCsvSampleWriter:
+    """
+    Writes samples to a CSV file with the header `columns`, sorted by `INDEX_COLUMNS` and then
+    `TIME_COLUMN`, and on `close()` writes "<stem>-index.json" next to it. The index gives the byte
+    range of the header and of the rows of each value of `INDEX_COLUMNS`, so that a client can
+    fetch the rows of one station or asset with an HTTP Range request. Ranges are [start, end),
+    i.e. "Range: bytes=<start>-<end - 1>".
+
+    The rows are spooled to a temporary CSV file per key next to `output`, so only the rows of one
+    key are held in memory while they are sorted by time.
+    """
+
+    def __init__(self, output: Path, columns: list[str]) -> None:
+        self.output = output
+        self.columns = columns
+        self.key_columns = [column for column in INDEX_COLUMNS if column in columns]
+        self.key_positions = [columns.index(column) for column in self.key_columns]
+        self.time_position = columns.index(TIME_COLUMN) if TIME_COLUMN in columns else None
+        self.spool = tempfile.TemporaryDirectory(prefix=f".{output.stem}-", dir=output.parent)
+        self.spools: dict[tuple[str, ...], Path] = {}
+        self.pending: dict[tuple[str, ...], list[tuple[Any, ...]]] = {}
+        self.buffered = 0
+        self.samples = 0
+
+    def write(self, sample: dict[str, Any]) -> None:
+        row = tuple(sample.get(column) for column in self.columns)
+        key = tuple(str(row[position] or "") for position in self.key_positions)
+        self.pending.setdefault(key, []).append(row)
+        self.buffered += 1
+        self.samples += 1
+        if self.buffered >= INDEX_SPOOL_ROWS:
+            self.flush()
+
+    def flush(self) -> None:
+        """Append the buffered rows to the spool files of their keys."""
+        for key, rows in self.pending.items():
+            path = self.spools.get(key)
+            if path is None:
+                path = self.spools[key] = Path(self.spool.name) / f"{len(self.spools)}.csv"
+            with path.open("a", encoding="utf-8", newline="") as stream:
+                csv.writer(stream).writerows(rows)
+        self.pending.clear()
+        self.buffered = 0
+
+    def close(self) -> int:
+        """Write the file and its index, and return the number of samples written."""
+        self.flush()
+
+        def time_of(row: list[str]) -> tuple[datetime | None, str]:
+            text = row[self.time_position] if self.time_position is not None else ""
+            return parse_utc_time(text), text
+
+        def sort_key(row: list[str]) -> tuple[Any, ...]:
+            time, text = time_of(row)
+            # Rows without a time come last.
+            return time is None, time.timestamp() if time else 0.0, text
+
+        ranges: list[dict[str, Any]] = []
+        with self.output.open("w", encoding="utf-8", newline="") as stream:
+            writer = csv.writer(stream)
+            writer.writerow(self.columns)
+            header_end = start = stream.tell()
+            for key in sorted(self.spools):
+                with self.spools[key].open(encoding="utf-8", newline="") as spool:
+                    rows = sorted(csv.reader(spool), key=sort_key)
+                writer.writerows(rows)
+                end = stream.tell()
+                times = [text for time, text in map(time_of, rows) if time]
+                ranges.append(
+                    {
+                        **dict(zip(self.key_columns, key)),
+                        "start": start,
+                        "end": end,
+                        "samples": len(rows),
+                        "time_range": [times[0], times[-1]] if times else None,
+                    }
+                )
+                start = end
+        self.spool.cleanup()
+
+        index = {
+            "file": self.output.name,
+            "key": self.key_columns,
+            "header": {"start": 0, "end": header_end},
+            "ranges": ranges,
+        }
+        self.index_path.write_text(json.dumps(index, indent=2) + "\n", encoding="utf-8")
+        return self.samples
+
+    @property
+    def index_path(self) -> Path:
+        return self.output.with_name(f"{self.output.stem}-index.json")
+
+
+SampleWriter = JsonSampleWriter | CsvSampleWriter | TableSampleWriter | IndexedCsvSampleWriter
+
+
+def open_sample_writer(
+    output: Path,
+    format: str,
+    columns: list[str],
+    indent: int,
+    index: bool = False,
+) -> SampleWriter:
+    """
+    Open a writer of samples to `output` in `format`, sorted and indexed if `index` is set for a
+    CSV file. JSON ignores `columns`, the others `indent`.
+    """
+    match format:
+        case "json":
+            return JsonSampleWriter(output, indent)
+        case "csv" if index:
+            return IndexedCsvSampleWriter(output, columns)
+        case "csv":
+            return CsvSampleWriter(output, columns)
+        case _:
+            return TableSampleWriter(output, columns, format)
+
+
+class Shard:
+    """One file of a `ShardedSampleWriter`, with the extent of the samples written to it."""
+
+    def __init__(self, key: tuple[str, ...], path: Path, writer: SampleWriter) -> None:
+        self.key = key
+        self.path = path
+        self.writer = writer
+        self.extent = ShardExtent()
+
+
+class ShardedSampleWriter:
+    """
+    Splits samples across one file per value of the `shard_by` columns, named after `output` as
+    "<stem>-<value><suffix>", and on `close()` writes "<stem>-shards.json". The manifest lists the
+    file of each shard with its number of samples, `TIME_COLUMN` and depth ranges and target
+    assets, as given for each sample by `assets_of`.
+    """
+
+    def __init__(
+        self,
+        output: Path,
+        shard_by: list[str],
+        open_writer: Callable[[Path], SampleWriter],
+        assets_of: Callable[[dict[str, Any]], Iterable[str]],
+    ) -> None:
+        self.output = output
+        self.shard_by = shard_by
+        self.open_writer = open_writer
+        self.assets_of = assets_of
+        self.shards: dict[tuple[str, ...], Shard] = {}
+        self.names: set[str] = set()
+
+    def shard(self, key: tuple[str, ...]) -> Shard:
+        shard = self.shards.get(key)
+        if shard is None:
+            path = shard_path(self.output, key, self.names)
+            shard = self.shards[key] = Shard(key, path, self.open_writer(path))
+        return shard
+
+    def write(self, sample: dict[str, Any]) -> None:
+        shard = self.shard(tuple(str(sample.get(column) or "") for column in self.shard_by))
+        shard.writer.write(sample)
+        shard.extent.add(sample.get(TIME_COLUMN), sample.get(DEPTH_COLUMN), self.assets_of(sample))
+
+    def close(self) -> int:
+        """Finish every shard, write the manifest and return the number of samples written."""
+        entries: list[dict[str, Any]] = []
+        total = 0
+        for key in sorted(self.shards):
+            shard = self.shards[key]
+            count = shard.writer.close()
+            total += count
+            entries.append(
+                {
+                    **dict(zip(self.shard_by, key)),
+                    "file": shard.path.name,
+                    "samples": count,
+                    "bytes": shard.path.stat().st_size,
+                    **shard.extent.manifest(),
+                }
+            )
+        manifest = {"shard_by": self.shard_by, "shards": entries}
+        self.manifest_path.write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+        return total
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.output.with_name(f"{self.output.stem}-shards.json")
+
+    @property
+    def size(self) -> int:
+        """The total size of the shard files, once closed."""
+        return sum(shard.path.stat().st_size for shard in self.shards.values())
+
+
+def level_list(value: str) -> list[int | None]:
+    """Parse a `--levels` value like "50,200,1000,full" into sample counts, None for "full"."""
+    levels: list[int | None] = []
+    for part in value.split(","):
+        part = part.strip().lower()
+        if part == "full":
+            levels.append(None)
+        elif part.isdigit() and int(part) > 0:
+            levels.append(int(part))
+        else:
+            raise argparse.ArgumentTypeError(
+                f"invalid level {part!r}, expected a positive number of samples or 'full'"
+            )
+    if len(set(levels)) != len(levels):
+        raise argparse.ArgumentTypeError(f"repeated level in {value!r}")
+    return levels
+
+
+def level_name(level: int | None) -> str:
+    return "full" if level is None else str(level)
+
+
+def level_path(output: Path, level: int | None) -> Path:
+    """Return the path of the `--levels` output of `level`, e.g. "ctd-cast-samples-200.csv"."""
+    return output.with_name(f"{output.stem}-{level_name(level)}{output.suffix}")
+
+
+def manifest_path(output: Path) -> Path:
+    return output.with_name(f"{output.stem}-manifest.json")
 
 
 def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
@@ -553,16 +1494,18 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
             # Write to the default output path (<root_name>.csv).
             ./collect_discrete_ctd_cast_samples.py ./ctd-cast-sample-source-files/
             # Write to a JSON file (format inferred from extension).
-            ./collect_discrete_ctd_cast_samples.py ./ctd-cast-sample-source-files/ --out ctd-cast-source-files.json
+            ./collect_discrete_ctd_cast_samples.py ./ctd-cast-sample-source-files/ \\
+                --out ctd-cast-source-files.json
             # Use compact JSON output with no indentation.
-            ./collect_discrete_ctd_cast_samples.py ./ctd-cast-sample-source-files/ --out ctd-cast-source-files.json --indent 0
+            ./collect_discrete_ctd_cast_samples.py ./ctd-cast-sample-source-files/ \\
+                --out ctd-cast-source-files.json --indent 0
         """),
     )
     parser.add_argument(
         "root",
         type=Path,
         metavar="ROOT",
-        help="Root directory to search recursively for *.cnv files.",
+        help="Root directory to search recursively for *.cnv and *.cnv.gz files.",
     )
     parser.add_argument(
         "--summary-samples",
@@ -577,10 +1520,11 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     )
     parser.add_argument(
         "--format",
-        choices=["csv", "json"],
+        choices=["csv", "json", *TABLE_FORMATS],
         default=None,
         dest="format",
-        help="Output format: csv or json. Takes priority over the extension of --out. (default: csv)",
+        help="Output format: csv, json, or typed and compressed parquet or arrow (IPC), which "
+        "require pyarrow. Takes priority over the extension of --out. (default: csv)",
     )
     parser.add_argument(
         "--out",
@@ -588,8 +1532,8 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         default=None,
         metavar="FILE",
         help=(
-            "Output file path. Format is inferred from the extension (.csv or .json) "
-            "when recognised, otherwise --format is used. "
+            "Output file path. Format is inferred from the extension (.csv, .json, .parquet or "
+            ".arrow) when recognised, otherwise --format is used. "
             "Defaults to <root_directory_name>.csv in the current directory."
         ),
     )
@@ -605,14 +1549,44 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         type=int,
         default=None,
         metavar="N",
-        help="Maximum number of evenly-spaced samples to keep per cast. By default all samples are kept.",
+        help=(
+            "Maximum number of evenly-spaced samples to keep per cast. By default all samples are "
+            "kept."
+        ),
+    )
+    parser.add_argument(
+        "--levels",
+        type=level_list,
+        default=None,
+        metavar="LEVELS",
+        help="Comma-separated resolutions to write in one pass over the files, each a maximum "
+        "number of samples per cast or 'full', e.g. '50,200,1000,full'. Each level is written to "
+        "<out>-<level> along with a <out>-manifest.json listing them. Replaces "
+        "--downsample-casts. (default: a single output)",
+    )
+    parser.add_argument(
+        "--shard-by",
+        action="append",
+        choices=list(SHARD_COLUMNS),
+        default=None,
+        help="Split the output into one <out>-<value> file per Station or Cruise, repeatable to "
+        "split by both, and list the files with their number of samples, time and depth ranges "
+        "and assets in <out>-shards.json. (default: a single file)",
+    )
+    parser.add_argument(
+        "--index",
+        action="store_true",
+        help="Sort the rows by station, target asset and start time, and write <out>-index.json "
+        "with the byte range of the rows of each station and asset, for HTTP Range requests. CSV "
+        "only, the samples are held in memory to be sorted.",
     )
     parser.add_argument(
         "--downsample-by",
         choices=["depth", "time"],
         default="depth",
         help="Dimension along which to evenly space downsampled points: 'depth' for even depth "
-        "spacing, 'time' for even row-index spacing. (default: depth)",
+        "spacing, 'time' for even row-index spacing. With 'depth', a cast without a valid depth "
+        "yields no samples, but its columns are still part of the CSV header. (default: depth)",
     )
     parser.add_argument(
         "--downsample-select",
@@ -621,13 +1595,58 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         help="How to select a value within each downsampling bin: 'average' averages all scans "
         "in the bin, 'first' picks a single representative scan. (default: average)",
     )
+    parser.add_argument(
+        "--layout",
+        choices=["expanded", "normalized"],
+        default="expanded",
+        help="'expanded' writes each scan once for every target asset of its cast. 'normalized' "
+        "writes each scan once with its cast's 'CTD File' key, and the assets of each cast to a "
+        "separate <out>-assets table. (default: expanded)",
+    )
+    parser.add_argument(
+        "--catalog",
+        action="store_true",
+        help="Instead of the samples, write a catalog of the casts with one row per file: its "
+        "station, target assets, header metadata, columns and estimated number of scans. Only "
+        "the header and size of each file are read.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Number of worker processes used to parse files, 0 for one per CPU. The output is the "
+        "same as with a single process. (default: 1)",
+    )
+    parser.add_argument(
+        "--cache",
+        type=Path,
+        default=None,
+        metavar="DIRECTORY",
+        help="Directory in which to cache the samples parsed from each file between runs. Files "
+        "that have not changed since, with the same options and summary entry, are not parsed "
+        "again. (default: no cache)",
+    )
     parser.add_argument(
         "--verbose",
         action="store_true",
         help="Enable DEBUG-level logging.",
     )
 
-    return parser.parse_args(argv)
+    args = parser.parse_args(argv)
+    if args.catalog:
+        conflicting = [
+            option
+            for option, value in (
+                ("--levels", args.levels),
+                ("--shard-by", args.shard_by),
+                ("--index", args.index),
+            )
+            if value
+        ]
+        if conflicting:
+            parser.error(f"--catalog cannot be combined with {', '.join(conflicting)}")
+    return args
 
 
 def main(argv: list[str] | None = None) -> int:
@@ -648,6 +1667,8 @@ def main(argv: list[str] | None = None) -> int:
         extension = args.out.suffix.lower()[1:]
         if extension in {"csv", "json"}:
             format = extension
+        elif extension in TABLE_FORMATS:
+            format = extension
         else:
             log.warning(
                 "Unrecognised extension '.%s' in --out, defaulting to 'csv'.",
@@ -659,6 +1680,19 @@ def main(argv: list[str] | None = None) -> int:
         format = "csv"
         out = Path(f"{root.name}.csv")
 
+    if format in TABLE_FORMATS:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            log.error(
+                "--format %s requires pyarrow, install it with: uv sync --extra columnar", format
+            )
+            return 1
+
+    if args.index and format != "csv":
+        log.error("--index requires the csv format.")
+        return 1
+
     if not args.summary_samples.exists():
         log.error("Summary file '%s' does not exist.", args.summary_samples)
         return 1
@@ -671,51 +1705,181 @@ def main(argv: list[str] | None = None) -> int:
         )
         return 1
 
-    files = sorted(root.rglob("*.cnv"))
+    files = find_source_files(root)
     if not files:
-        log.error("No *.cnv files found under '%s', exiting.", root)
+        log.error("No *.cnv or *.cnv.gz files found under '%s', exiting.", root)
         return 1
 
     log.info("Found %s *.cnv file(s) under '%s'.", len(files), root)
 
-    downsample: int | None = args.downsample_casts
-    downsample_by: str = args.downsample_by
-    downsample_select: str = args.downsample_select
+    if args.catalog:
+        out.parent.mkdir(parents=True, exist_ok=True)
+        writer = open_sample_writer(out, format, CATALOG_COLUMNS, args.indent)
+        unresolved = 0
+        for file in files:
+            entry = catalog_entry(file, ctd_file_lookup)
+            if entry is None:
+                log.warning("No data header or columns found in %s, skipping.", file)
+                continue
+            unresolved += not entry["Station"]
+            writer.write(entry)
+        total = writer.close()
+        log.info(
+            "Cataloged %s cast(s), %s without a station in the summary.", total, unresolved
+        )
+        log.info(f"'{out}': ({out.stat().st_size / 1024:.1f} KB)")
+        return 0
+
+    levels: list[int | None] = [args.downsample_casts]
+    outputs = [out]
+    if args.levels is not None:
+        if args.downsample_casts is not None:
+            log.error("--levels and --downsample-casts cannot be combined.")
+            return 1
+        levels = args.levels
+        outputs = [level_path(out, level) for level in levels]
+
+    jobs: int = min(args.jobs or os.cpu_count() or 1, len(files))
+
+    options: dict[str, Any] = {
+        "levels": levels,
+        "downsample_by": args.downsample_by,
+        "downsample_select": args.downsample_select,
+        "layout": args.layout,
+    }
+    cache: ParseCache | None = None
+    if args.cache is not None:
+        cache = ParseCache(args.cache, ctd_file_lookup, options)
+
+    def batches() -> Iterator[tuple[Path, list[SampleBatch]]]:
+        """Yield each file's samples in order, from the cache or parsed by the pool."""
+        missing = [file for file in files if cache is None or not cache.contains(file)]
+        if jobs > 1:
+            workers = min(jobs, len(missing)) or 1
+            parsed = parse_in_pool(missing, ctd_file_lookup, workers, **options)
+        else:
+            parsed = ((file, collect_batches(file, ctd_file_lookup, **options)) for file in missing)
+        missing_set = set(missing)
+
+        for file in files:
+            if cache is not None and file not in missing_set:
+                cached = cache.get(file)
+                if cached is not None:
+                    yield file, cached
+                    continue
+                # The entry has become unreadable since it was looked up.
+                file_batches = collect_batches(file, ctd_file_lookup, **options)
+            else:
+                _, file_batches = next(parsed)
+            if cache is not None:
+                cache.store(file, file_batches)
+            yield file, file_batches
+
+    # Assets of the casts that produced samples, by "CTD File" key, for the normalized layout.
+    cast_assets: dict[str, list[str]] = {}
+
+    def record_cast(file: Path, counts: list[int]) -> None:
+        log.info("  '%s' (%s sample(s))", file, ", ".join(str(count) for count in counts))
+        if any(counts):
+            stem = source_stem(file)
+            resolved = resolve_station(stem, ctd_file_lookup)
+            if resolved is not None:
+                cast_assets.setdefault(ctd_file_key(stem), resolved[1])
+
+    def stream() -> Iterator[tuple[int, dict[str, Any]]]:
+        """Yield each sample along with the position of its level in `levels`."""
+        if cache is not None or jobs > 1:
+            for file, file_batches in batches():
+                for index, batch in enumerate(file_batches):
+                    for sample in batch.samples():
+                        yield index, sample
+                record_cast(file, [len(batch.rows) for batch in file_batches])
+            return
 
-    def stream() -> Iterator[dict[str, Any]]:
         for file in files:
             log.debug("Parsing '%s'.", file)
-            count = 0
-            for sample in parse(
-                file,
-                ctd_file_lookup,
-                downsample=downsample,
-                downsample_by=downsample_by,
-                downsample_select=downsample_select,
-            ):
-                count += 1
-                yield sample
-            log.info("  '%s' (%s sample(s))", file, count)
+            counts = [0] * len(levels)
+            for index, sample in parse_levels(file, ctd_file_lookup, **options):
+                counts[index] += 1
+                yield index, sample
+            record_cast(file, counts)
 
     out.parent.mkdir(parents=True, exist_ok=True)
 
-    match format:
-        case "csv":
-            columns = discover_columns(
-                files,
-                ctd_file_lookup,
-                downsample=downsample,
-                downsample_by=downsample_by,
-                downsample_select=downsample_select,
+    columns: list[str] = []
+    if format != "json":
+        columns = discover_columns(files, ctd_file_lookup, args.layout)
+
+    def open_writer(output: Path) -> SampleWriter:
+        return open_sample_writer(output, format, columns, args.indent, args.index)
+
+    def assets_of(sample: dict[str, Any]) -> list[str]:
+        if args.layout == "normalized":
+            return ctd_file_lookup.get(sample["CTD File"], ("", []))[1]
+        return [sample["Target Asset"]] if sample.get("Target Asset") else []
+
+    shard_by = list(dict.fromkeys(SHARD_COLUMNS[key] for key in args.shard_by or []))
+    writers: list[SampleWriter | ShardedSampleWriter] = [
+        ShardedSampleWriter(output, shard_by, open_writer, assets_of) if shard_by
+        else open_writer(output)
+        for output in outputs
+    ]
+    for index, sample in stream():
+        writers[index].write(sample)
+    totals = [writer.close() for writer in writers]
+
+    log.info("Wrote %s sample(s) from %s file(s).", sum(totals), len(files))
+    if cache is not None:
+        log.info("Cache: %s file(s) reused, %s parsed.", cache.hits, len(files) - cache.hits)
+    for output, writer in zip(outputs, writers):
+        if isinstance(writer, ShardedSampleWriter):
+            log.info(
+                f"'{writer.manifest_path}': {len(writer.shards)} shard(s) "
+                f"({writer.size / 1024:.1f} KB)"
             )
-            total = write_samples_as_csv(stream(), out, columns)
-        case "json":
-            total = write_samples_as_json(stream(), out, args.indent)
-        case _:
-            total = 0
-
-    log.info("Wrote %s sample(s) from %s file(s).", total, len(files))
-    log.info(f"'{out}': ({out.stat().st_size / 1024:.1f} KB)")
+        else:
+            log.info(f"'{output}': ({output.stat().st_size / 1024:.1f} KB)")
+
+    if args.layout == "normalized":
+        assets_out = assets_table_path(out)
+        asset_columns = ["CTD File", "Target Asset"]
+        writer = open_sample_writer(assets_out, format, asset_columns, args.indent)
+        for key, key_assets in cast_assets.items():
+            for asset in key_assets:
+                writer.write({"CTD File": key, "Target Asset": asset})
+        writer.close()
+        log.info(f"'{assets_out}': ({assets_out.stat().st_size / 1024:.1f} KB)")
+
+    if args.levels is not None:
+        manifest: dict[str, Any] = {
+            "format": format,
+            "layout": args.layout,
+            "downsample_by": args.downsample_by,
+            "downsample_select": args.downsample_select,
+            "levels": [
+                {
+                    "level": level_name(level),
+                    "max_samples_per_cast": level,
+                    "file": (
+                        writer.manifest_path.name
+                        if isinstance(writer, ShardedSampleWriter)
+                        else output.name
+                    ),
+                    "samples": total,
+                    "bytes": (
+                        writer.size
+                        if isinstance(writer, ShardedSampleWriter)
+                        else output.stat().st_size
+                    ),
+                }
+                for level, output, writer, total in zip(levels, outputs, writers, totals)
+            ],
+        }
+        if args.layout == "normalized":
+            manifest["assets"] = assets_table_path(out).name
+        manifest_out = manifest_path(out)
+        manifest_out.write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+        log.info("Wrote the manifest of %s level(s) to '%s'.", len(levels), manifest_out)
     return 0
 
 
@@ -5,12 +5,15 @@ file where every line/array element represents one sample.
 
 The header of the first file found is used as the output header. Rows from files whose header
 differs from the first are still included, missing fields are written as empty and extra fields
-are ignored.
+are ignored. Gzip-compressed *.csv.gz files are read too.
 
 Usage:
-    ./collect_discrete_summary_samples.py ROOT [--out FILE] [--format {csv,json}] [--indent N] [--verbose]
+    ./collect_discrete_summary_samples.py ROOT [--out FILE] [--format {csv,json,parquet,arrow}]
+                                        [--indent N] [--layout {expanded,normalized}]
+                                        [--shard-by {station,cruise}] [--index] [--verbose]
 
-The output format is inferred from the extension of `--out` when it is ".csv" or ".json".
+The output format is inferred from the extension of `--out` when it is ".csv", ".json", ".parquet"
+or ".arrow". The Parquet and Arrow IPC formats require pyarrow.
 
 If the extension is unrecognised, `--format` is used instead (default: csv).
 """
@@ -19,14 +22,19 @@ from __future__ import annotations
 
 import argparse
 import csv
+import gzip
 import json
 import logging
 import re
 import sys
+from collections.abc import Callable
+from itertools import chain
 from pathlib import Path
 from textwrap import dedent
 from typing import Any
 
+from discrete_output import ShardExtent, column_array, parse_utc_time, shard_path
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(levelname)-8s %(message)s",
@@ -36,6 +44,22 @@ log = logging.getLogger(__name__)
 # Matches a distance-offset suffix like " - 500 m SW".
 _STATION_OFFSET_RE = re.compile(r"\s+-\s+\d+\s+m\b.*$")
 
+# Output formats written with pyarrow, also the extensions of `--out` they are inferred from.
+TABLE_FORMATS: tuple[str, ...] = ("parquet", "arrow")
+
+# `--shard-by` choices → the column whose values name the shards.
+SHARD_COLUMNS: dict[str, str] = {
+    "station": "Station",
+    "cruise": "Cruise",
+}
+
+# Columns whose ranges are reported for each `--shard-by` shard.
+TIME_COLUMN = "Start Time [UTC]"
+DEPTH_COLUMN = "CTD Depth [m]"
+
+# Columns an `--index` output is sorted and indexed by, those present, before `TIME_COLUMN`.
+INDEX_COLUMNS: list[str] = ["Station", "Target Asset"]
+
 # Substrings (case-insensitive) that cause a column to be omitted from output.
 COLUMN_IGNORE: list[str] = [
     "bottle",
@@ -66,18 +90,52 @@ def strip_station_offset(station: str) -> str:
     return _STATION_OFFSET_RE.sub("", station).strip()
 
 
+def split_assets(value: str | None) -> list[str]:
+    """Split a comma-separated "Target Asset" value into its asset designators."""
+    return [designator.strip() for designator in (value or "").split(",") if designator.strip()]
+
+
+def assets_table_path(output: Path) -> Path:
+    """Return the path of the asset table written next to `output` in the normalized layout."""
+    return output.with_name(f"{output.stem}-assets{output.suffix}")
+
+
+def read_source(path: Path) -> str:
+    """Read a .csv file as text, decompressing it if it is gzip-compressed."""
+    if path.suffix.lower() == ".gz":
+        with gzip.open(path, "rt") as stream:
+            return stream.read()
+    return path.read_text()
+
+
+def find_source_files(root: Path) -> list[Path]:
+    """
+    Return all *.csv and *.csv.gz files under `root`, ordered by their uncompressed path. When a
+    file is present both plain and compressed, the more recently modified copy is used.
+    """
+    found: dict[Path, Path] = {}
+    for path in chain(root.rglob("*.csv"), root.rglob("*.csv.gz")):
+        key = path.with_name(path.name[:-3]) if path.suffix == ".gz" else path
+        current = found.get(key)
+        if current is None or path.stat().st_mtime > current.stat().st_mtime:
+            found[key] = path
+    return [found[key] for key in sorted(found)]
+
+
 def parse(
     path: Path,
     columns: list[str] | None,
+    expand: bool = True,
 ) -> tuple[list[str], list[dict[str, Any]]]:
-    """Read `path` as a CSV file.
+    """Read `path` as a (possibly gzip-compressed) CSV file.
 
     Returns a (columns, rows) tuple.  If `columns` is provided (i.e. this is not the first file) it
     is used as the canonical column order. Rows with a differing header are still read but mapped
-    onto the canonical columns.
+    onto the canonical columns. With `expand`, a row with several target assets is repeated once
+    for each of them.
     """
     try:
-        text = path.read_text()
+        text = read_source(path)
     except OSError as exc:
         log.error("Cannot read %s: %s", path, exc)
         return columns or [], []
@@ -110,14 +168,9 @@ def parse(
             row["Cast"] = normalize_cast(row.get("Cast") or "")
 
         # Split the "Target Asset" column into individual assets, if present.
-        raw_asset = row.get("Target Asset") or ""
-        assets = [
-            designator.strip()
-            for designator in raw_asset.split(",")
-            if designator.strip()
-        ]
+        assets = split_assets(row.get("Target Asset"))
 
-        if len(assets) <= 1:
+        if len(assets) <= 1 or not expand:
             expanded.append(row)
         else:
             for asset in assets:
@@ -128,6 +181,58 @@ def parse(
     return columns, expanded
 
 
+def normalize_rows(
+    columns: list[str],
+    rows: list[dict[str, Any]],
+) -> tuple[list[str], list[dict[str, Any]], list[dict[str, Any]]]:
+    """
+    Move the target assets of `rows` into a separate table keyed by a new "Sample ID" column.
+
+    Returns the (columns, rows) of the samples, without "Target Asset", and the rows of the asset
+    table, one per ("Sample ID", "Target Asset") pair.
+    """
+    samples: list[dict[str, Any]] = []
+    assets: list[dict[str, Any]] = []
+    for sample_id, row in enumerate(rows, start=1):
+        row = dict(row)
+        for asset in split_assets(row.pop("Target Asset", None)):
+            assets.append({"Sample ID": sample_id, "Target Asset": asset})
+        samples.append({"Sample ID": sample_id, **row})
+    columns = ["Sample ID", *(column for column in columns if column != "Target Asset")]
+    return columns, samples, assets
+
+
+def shard_rows(
+    rows: list[dict[str, Any]],
+    shard_by: list[str],
+    output: Path,
+) -> dict[tuple[str, ...], tuple[Path, list[dict[str, Any]]]]:
+    """
+    Group `rows` by their values of the `shard_by` columns. Returns the path of each group's file,
+    named after `output` as "<stem>-<value><suffix>", along with its rows, in order of the values.
+    """
+    groups: dict[tuple[str, ...], list[dict[str, Any]]] = {}
+    for row in rows:
+        groups.setdefault(tuple(row.get(column) or "" for column in shard_by), []).append(row)
+
+    shards: dict[tuple[str, ...], tuple[Path, list[dict[str, Any]]]] = {}
+    names: set[str] = set()
+    for key in sorted(groups):
+        shards[key] = (shard_path(output, key, names), groups[key])
+    return shards
+
+
+def shard_extent(
+    rows: list[dict[str, Any]],
+    assets_of: Callable[[dict[str, Any]], list[str]],
+) -> dict[str, Any]:
+    """Return the time and depth ranges of `rows` and their target assets for the shard manifest."""
+    extent = ShardExtent()
+    for row in rows:
+        extent.add(row.get(TIME_COLUMN), row.get(DEPTH_COLUMN), assets_of(row))
+    return extent.manifest()
+
+
 def write_as_csv(
     columns: list[str],
     rows: list[dict[str, Any]],
@@ -139,6 +244,70 @@ def write_as_csv(
         writer.writerows(rows)
 
 
+def write_as_indexed_csv(
+    columns: list[str],
+    rows: list[dict[str, Any]],
+    output: Path,
+) -> None:
+    """
+    Write `rows` like `write_as_csv()`, but sorted by `INDEX_COLUMNS` and then `TIME_COLUMN`, and
+    write "<stem>-index.json" next to `output` with the byte range of the header and of the rows of
+    each value of `INDEX_COLUMNS`, for HTTP Range requests. Ranges are [start, end), i.e.
+    "Range: bytes=<start>-<end - 1>".
+    """
+    key_columns = [column for column in INDEX_COLUMNS if column in columns]
+
+    def key_of(row: dict[str, Any]) -> tuple[str, ...]:
+        return tuple(row.get(column) or "" for column in key_columns)
+
+    def sort_key(row: dict[str, Any]) -> tuple[Any, ...]:
+        text = row.get(TIME_COLUMN) or ""
+        time = parse_utc_time(text)
+        # Rows without a time come last.
+        return key_of(row), time is None, time.timestamp() if time else 0.0, text
+
+    rows = sorted(rows, key=sort_key)
+    ranges: list[dict[str, Any]] = []
+    with output.open("w", encoding="utf-8", newline="") as stream:
+        writer = csv.DictWriter(stream, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        header_end = start = stream.tell()
+        first = 0
+        for position, row in enumerate(rows):
+            writer.writerow(row)
+            key = key_of(row)
+            following = position + 1
+            if following < len(rows) and key_of(rows[following]) == key:
+                continue
+            # `row` is the last one of its key.
+            end = stream.tell()
+            times = [
+                sample[TIME_COLUMN]
+                for sample in rows[first:following]
+                if parse_utc_time(sample.get(TIME_COLUMN) or "")
+            ]
+            ranges.append(
+                {
+                    **dict(zip(key_columns, key)),
+                    "start": start,
+                    "end": end,
+                    "samples": following - first,
+                    "time_range": [times[0], times[-1]] if times else None,
+                }
+            )
+            start = end
+            first = following
+
+    index = {
+        "file": output.name,
+        "key": key_columns,
+        "header": {"start": 0, "end": header_end},
+        "ranges": ranges,
+    }
+    index_path = output.with_name(f"{output.stem}-index.json")
+    index_path.write_text(json.dumps(index, indent=2) + "\n", encoding="utf-8")
+
+
 def write_as_json(
     rows: list[dict[str, Any]],
     output: Path,
@@ -149,35 +318,64 @@ def write_as_json(
         stream.write("\n")
 
 
+def write_as_table(
+    columns: list[str],
+    rows: list[dict[str, Any]],
+    output: Path,
+    fmt: str,
+) -> None:
+    """Write `rows` to a zstd-compressed Parquet or Arrow IPC file, typed by `column_array()`."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.table(
+        [column_array([row.get(column) for row in rows]) for column in columns], names=columns
+    )
+    match fmt:
+        case "parquet":
+            pq.write_table(table, output, compression="zstd")
+        case "arrow":
+            options = pa.ipc.IpcWriteOptions(compression="zstd")
+            with pa.ipc.new_file(output, table.schema, options=options) as writer:
+                writer.write_table(table)
+
+
 def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
-        description="Combine all discrete sample summary *.csv files under ROOT into a single CSV or JSON file.",
+        description=(
+            "Combine all discrete sample summary *.csv files under ROOT into a single CSV or JSON "
+            "file."
+        ),
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog=dedent("""
           examples:
             # Write to the default output path (<root_name>.csv).
             ./collect_discrete_summary_samples.py ./source-data/summary-sample-source-files
             # Write to a JSON file (format inferred from extension).
-            ./collect_discrete_summary_samples.py ./source-data/summary-sample-source-files --out summary-samples.json
+            ./collect_discrete_summary_samples.py ./source-data/summary-sample-source-files \\
+                --out summary-samples.json
             # Override format explicitly.
-            ./collect_discrete_summary_samples.py ./source-data/summary-sample-source-files --format json
+            ./collect_discrete_summary_samples.py ./source-data/summary-sample-source-files \\
+                --format json
             # Use compact JSON output with no indentation.
-            ./collect_discrete_summary_samples.py ./source-data/summary-sample-source-files --out summary-samples.json --indent 0
+            ./collect_discrete_summary_samples.py ./source-data/summary-sample-source-files \\
+                --out summary-samples.json --indent 0
         """),
     )
     parser.add_argument(
         "root",
         type=Path,
         metavar="ROOT",
-        help="Root directory to search recursively for *.csv files.",
+        help="Root directory to search recursively for *.csv and *.csv.gz files.",
     )
     parser.add_argument(
         "--format",
-        choices=["csv", "json"],
+        choices=["csv", "json", *TABLE_FORMATS],
         default=None,
         dest="format",
         help=(
-            "Output format: csv or json. Takes priority over the extension of `--out`. (default: csv)"
+            "Output format: csv, json, or typed and compressed parquet or arrow (IPC), which "
+            "require pyarrow. Takes priority over the extension of `--out`. (default: csv)"
         ),
     )
     parser.add_argument(
@@ -186,8 +384,8 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         default=None,
         metavar="FILE",
         help=(
-            "Output file path. Format is inferred from the extension (.csv or .json) when "
-            "recognised, otherwise `--format` is used. "
+            "Output file path. Format is inferred from the extension (.csv, .json, .parquet or "
+            ".arrow) when recognised, otherwise `--format` is used. "
             "Defaults to <root_directory_name>.csv in the current directory."
         ),
     )
@@ -198,6 +396,36 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         metavar="N",
         help="JSON indentation level, use 0 for compact output. (default: 2)",
     )
+    parser.add_argument(
+        "--layout",
+        choices=["expanded", "normalized"],
+        default="expanded",
+        help=(
+            "'expanded' writes a sample once for each of its target assets. 'normalized' writes "
+            "each sample once with a 'Sample ID', and its target assets to a separate "
+            "<out>-assets table. (default: expanded)"
+        ),
+    )
+    parser.add_argument(
+        "--shard-by",
+        action="append",
+        choices=list(SHARD_COLUMNS),
+        default=None,
+        help=(
+            "Split the output into one <out>-<value> file per Station or Cruise, repeatable to "
+            "split by both, and list the files with their number of samples, time and depth "
+            "ranges and assets in <out>-shards.json. (default: a single file)"
+        ),
+    )
+    parser.add_argument(
+        "--index",
+        action="store_true",
+        help=(
+            "Sort the rows by station, target asset and start time, and write <out>-index.json "
+            "with the byte range of the rows of each station and asset, for HTTP Range requests. "
+            "CSV only."
+        ),
+    )
     parser.add_argument(
         "--verbose",
         action="store_true",
@@ -223,7 +451,7 @@ def main(argv: list[str] | None = None) -> int:
         out = args.out if args.out is not None else Path(f"{root.name}.{fmt}")
     elif args.out is not None:
         extension = args.out.suffix.lower()[1:]
-        if extension in {"csv", "json"}:
+        if extension in {"csv", "json", *TABLE_FORMATS}:
             fmt = extension
         else:
             log.warning(
@@ -236,9 +464,22 @@ def main(argv: list[str] | None = None) -> int:
         fmt = "csv"
         out = Path(f"{root.name}.csv")
 
-    files = sorted(root.rglob("*.csv"))
+    if fmt in TABLE_FORMATS:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            log.error(
+                "--format %s requires pyarrow, install it with: uv sync --extra columnar", fmt
+            )
+            return 1
+
+    if args.index and fmt != "csv":
+        log.error("--index requires the csv format.")
+        return 1
+
+    files = find_source_files(root)
     if not files:
-        log.warning("No *.csv files found under '%s', exiting.", root)
+        log.warning("No *.csv or *.csv.gz files found under '%s', exiting.", root)
         return 0
 
     log.info("Found %d *.csv file(s) under '%s'.", len(files), root)
@@ -248,21 +489,66 @@ def main(argv: list[str] | None = None) -> int:
 
     for file in files:
         log.debug("Reading '%s'.", file)
-        columns, current_rows = parse(file, columns)
+        columns, current_rows = parse(file, columns, expand=args.layout == "expanded")
         log.info("  '%s' (%d row(s))", file, len(current_rows))
         rows.extend(current_rows)
 
     log.info("Collected %d row(s) from %d file(s).", len(rows), len(files))
 
-    out.parent.mkdir(parents=True, exist_ok=True)
+    outputs: list[tuple[Path, list[str], list[dict[str, Any]]]] = []
+    sample_assets: dict[int, list[str]] = {}
+    if args.layout == "normalized":
+        columns, rows, assets = normalize_rows(columns or [], rows)
+        for asset in assets:
+            sample_assets.setdefault(asset["Sample ID"], []).append(asset["Target Asset"])
+        outputs.append((out, columns, rows))
+        outputs.append((assets_table_path(out), ["Sample ID", "Target Asset"], assets))
+    else:
+        outputs.append((out, columns or [], rows))
 
-    match fmt:
-        case "csv":
-            write_as_csv(columns or [], rows, out)
-        case "json":
-            write_as_json(rows, out, args.indent)
+    def assets_of(row: dict[str, Any]) -> list[str]:
+        if args.layout == "normalized":
+            return sample_assets.get(row["Sample ID"], [])
+        return split_assets(row.get("Target Asset"))
+
+    shard_by = list(dict.fromkeys(SHARD_COLUMNS[key] for key in args.shard_by or []))
+    shards = shard_rows(rows, shard_by, out) if shard_by else {}
+    if shards:
+        outputs[:1] = [(path, outputs[0][1], shard) for path, shard in shards.values()]
 
-    log.info("'%s': (%.1f KB)", out, out.stat().st_size / 1024)
+    out.parent.mkdir(parents=True, exist_ok=True)
+
+    for path, path_columns, path_rows in outputs:
+        indexed = args.index and path != assets_table_path(out)
+        match fmt:
+            case "csv" if indexed:
+                write_as_indexed_csv(path_columns, path_rows, path)
+            case "csv":
+                write_as_csv(path_columns, path_rows, path)
+            case "json":
+                write_as_json(path_rows, path, args.indent)
+            case "parquet" | "arrow":
+                write_as_table(path_columns, path_rows, path, fmt)
+
+        log.info("'%s': (%.1f KB)", path, path.stat().st_size / 1024)
+
+    if shards:
+        manifest = {
+            "shard_by": shard_by,
+            "shards": [
+                {
+                    **dict(zip(shard_by, key)),
+                    "file": path.name,
+                    "samples": len(shard),
+                    "bytes": path.stat().st_size,
+                    **shard_extent(shard, assets_of),
+                }
+                for key, (path, shard) in shards.items()
+            ],
+        }
+        manifest_out = out.with_name(f"{out.stem}-shards.json")
+        manifest_out.write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+        log.info("Wrote the manifest of %d shard(s) to '%s'.", len(shards), manifest_out)
     return 0
 
 
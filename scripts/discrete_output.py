@@ -0,0 +1,128 @@
+"""
+Output helpers shared by `collect_discrete_summary_samples.py` and
+`collect_discrete_ctd_cast_samples.py`.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from collections.abc import Iterable
+from datetime import datetime
+from functools import cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+# Matches a value written as an integer, e.g. a cast number.
+_INTEGER_RE = re.compile(r"^[-+]?\d+$")
+
+
+def is_integer(value: Any) -> bool:
+    """Return True for an `int` (but not a `bool`) or a string written as an integer."""
+    if isinstance(value, str):
+        return _INTEGER_RE.match(value) is not None
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def column_array(values: list[Any]) -> pa.Array:
+    """
+    Convert the values of one output column to an Arrow array of the narrowest type that holds all
+    of them: int64, float64, a UTC timestamp, or else dictionary-encoded strings. `None` and empty
+    values become nulls.
+    """
+    import pyarrow as pa
+
+    cells = [None if value is None or value == "" else value for value in values]
+    present = [cell for cell in cells if cell is not None]
+    if present and all(is_integer(cell) for cell in present):
+        return pa.array([None if cell is None else int(cell) for cell in cells], pa.int64())
+    try:
+        return pa.array([None if cell is None else float(cell) for cell in cells], pa.float64())
+    except ValueError:
+        pass
+    try:
+        times = [None if cell is None else datetime.fromisoformat(cell) for cell in cells]
+        if all(time is None or time.tzinfo is not None for time in times):
+            return pa.array(times, pa.timestamp("ms", tz="UTC"))
+    except (TypeError, ValueError):
+        pass
+    return pa.array(
+        [None if cell is None else str(cell) for cell in cells], pa.string()
+    ).dictionary_encode()
+
+
+def slugify(value: str) -> str:
+    """Return `value` lower-cased with every run of other characters than a-z and 0-9 as "-"."""
+    return re.sub(r"[^a-z0-9]+", "-", value.lower()).strip("-") or "unknown"
+
+
+@cache
+def parse_utc_time(value: str) -> datetime | None:
+    """Parse an ISO-8601 time with a UTC offset, or return None."""
+    try:
+        time = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return time if time.tzinfo is not None else None
+
+
+def shard_path(output: Path, key: tuple[str, ...], names: set[str]) -> Path:
+    """
+    Return the file of the `--shard-by` shard `key`, named after `output` as
+    "<stem>-<value><suffix>", and add its name to the `names` already taken.
+    """
+    name = "_".join(slugify(value) for value in key)
+    # Keep apart the values that only differ in case or punctuation.
+    unique = name
+    suffix = 2
+    while unique in names:
+        unique = f"{name}-{suffix}"
+        suffix += 1
+    names.add(unique)
+    return output.with_name(f"{output.stem}-{unique}{output.suffix}")
+
+
+class ShardExtent:
+    """The time and depth ranges and the target assets of the samples of one shard."""
+
+    def __init__(self) -> None:
+        self.first_time: tuple[datetime, str] | None = None
+        self.last_time: tuple[datetime, str] | None = None
+        self.depths: tuple[float, float] | None = None
+        self.assets: dict[str, None] = {}
+
+    def add(self, time: Any, depth: Any, assets: Iterable[str]) -> None:
+        """Extend the extent by one sample, ignoring a time or depth that cannot be parsed."""
+        parsed = parse_utc_time(time) if isinstance(time, str) else None
+        if parsed is not None:
+            if self.first_time is None or parsed < self.first_time[0]:
+                self.first_time = (parsed, time)
+            if self.last_time is None or parsed > self.last_time[0]:
+                self.last_time = (parsed, time)
+
+        try:
+            value = float(depth or "nan")
+        except (TypeError, ValueError):
+            value = math.nan
+        if math.isfinite(value):
+            if self.depths is None:
+                self.depths = (value, value)
+            else:
+                self.depths = (min(self.depths[0], value), max(self.depths[1], value))
+
+        self.assets.update(dict.fromkeys(assets))
+
+    def manifest(self) -> dict[str, Any]:
+        """Return the extent as the "time_range", "depth_range" and "assets" of a manifest entry."""
+        return {
+            "time_range": (
+                [self.first_time[1], self.last_time[1]]
+                if self.first_time and self.last_time
+                else None
+            ),
+            "depth_range": None if self.depths is None else list(self.depths),
+            "assets": list(self.assets),
+        }
@@ -3,32 +3,89 @@
 Recursively mirror https://rawdata-west.oceanobservatories.org/files/ into a local directory.
 
 Usage:
-    ./download_rawdata.py [GLOB] [--destination DIR] [--flatten] [--workers N] [--dry-run] [--verbose]
+    ./download_rawdata.py [GLOB] [--destination DIR] [--target GLOB DIR]... [--flatten] [--workers N] [--crawl-workers N] [--verbose]
 
     GLOB  Optional glob pattern for files to download, relative to the archive root,
           e.g. "cruise_data/Cabled/*/Water_Sampling/CTD Data/*.btl"
 """
 
 import argparse
+import asyncio
 import fnmatch
+import gzip
+import json
 import logging
+import math
+import re
 import sys
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from bisect import bisect_right
+from collections.abc import AsyncIterator, Callable, Iterator, Mapping
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from datetime import datetime, timezone
+from functools import partial
+from html import unescape
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, BinaryIO, NamedTuple, Protocol
 from urllib.parse import unquote, urljoin, urlparse
 
 import requests
-from bs4 import BeautifulSoup
-from requests import Session
+from bs4 import BeautifulSoup, NavigableString
+from requests import Response, Session
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
 
+if TYPE_CHECKING:
+    import httpx
+
 BASE_URL = "https://rawdata-west.oceanobservatories.org/files/"
 DEFAULT_DESTINATION = Path("raw")
 DEFAULT_WORKERS = 8
+DEFAULT_CRAWL_WORKERS = 4
+DEFAULT_ASYNC_IN_FLIGHT = 100  # Requests in flight with `--engine async`.
+ASYNC_LISTING_SHARE = 0.25  # Part of the requests in flight reserved for listings (async).
 CHUNK_SIZE = 1024 * 256  # 256 KiB
 RETRY_LIMIT = 3
 RETRY_BACKOFF = 2.0  # Seconds, doubles on each retry.
+PROGRESS_INTERVAL = 100  # Files between progress log lines.
+DEFAULT_LISTING_CACHE = Path.home() / ".cache" / "ooi-rawdata" / "listings.json"
+DEFAULT_LISTING_TTL = 6 * 60 * 60  # Seconds.
+DEFAULT_STATE_FILE = Path.home() / ".cache" / "ooi-rawdata" / "state.json"
+DEFAULT_FULL_WALK_DAYS = 7.0  # Days between full walks with `--since-last-run`.
+GZIP_LEVEL = 6  # Compression level for files stored with `--compress`.
+# Files that are already compressed are stored as they are, even with `--compress`.
+COMPRESSED_SUFFIXES = (".gz", ".bz2", ".xz", ".zip", ".zst")
+
+# Matches the last-modified and size columns that follow a link in an Apache listing, e.g.
+# "2015-07-06 15:59  1.2M" (HTMLTable) or "06-Jul-2015 15:59   893" (<pre>).
+_LISTING_DETAILS_RE = re.compile(
+    r"(?P<modified>\d{4}-\d{2}-\d{2} \d{2}:\d{2}(?::\d{2})?"
+    r"|\d{2}-[A-Za-z]{3}-\d{4} \d{2}:\d{2}(?::\d{2})?)"
+    r"\s+(?P<size>-|\d+(?:\.\d)?[KMGTPE]?)"
+)
+_LISTING_MODIFIED_FORMATS = (
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%d %H:%M:%S",
+    "%d-%b-%Y %H:%M",
+    "%d-%b-%Y %H:%M:%S",
+)
+
+# Matches one link of an Apache index page plus the rest of its table row or <pre> line.
+_INDEX_LINK_RE = re.compile(
+    r'<a\s+href="(?P<href>[^"]*)"[^>]*>(?P<text>[^<]*)</a>(?P<details>.*?)(?=\n|</tr>|<a\s|\Z)',
+    re.IGNORECASE | re.DOTALL,
+)
+_ANCHOR_RE = re.compile(r"<a\s", re.IGNORECASE)
+_TAG_RE = re.compile(r"<[^>]*>")
+
+# Matches the start of a "Content-Range: bytes START-END/TOTAL" header.
+_CONTENT_RANGE_RE = re.compile(r"^bytes\s+(\d+)-")
 
 logging.basicConfig(
     level=logging.DEBUG,
@@ -38,6 +95,227 @@ logging.basicConfig(
 log = logging.getLogger(__name__)
 
 
+class AdaptiveLimiter:
+    """
+    Additive-increase/multiplicative-decrease (AIMD) limit on the number of requests in flight.
+
+    Every completed request reports its latency and whether it succeeded. Unless given, the limit
+    starts at `START_FRACTION` of `maximum` and grows by about one request per round trip while
+    responses stay close to the best latency seen so far. It is cut by `DECREASE` when a request
+    fails (5xx, 429, timeout, connection error) or its latency exceeds `LATENCY_TOLERANCE` times
+    that baseline plus `LATENCY_SLACK`. Decreases are spaced at least one baseline latency apart
+    so a burst of slow responses only counts once.
+    """
+
+    START_FRACTION = 0.25
+    DECREASE = 0.7
+    LATENCY_TOLERANCE = 2.0
+    LATENCY_SLACK = 0.05  # Seconds, keeps jitter on very fast links from counting as congestion.
+    # Weight of a new sample when letting the latency baseline drift upwards.
+    BASELINE_DRIFT = 0.01
+
+    def __init__(self, maximum: int, limit: int | None = None, minimum: int = 1) -> None:
+        self.minimum = max(minimum, 1)
+        self.maximum = max(maximum, self.minimum)
+        if limit is None:
+            limit = math.ceil(self.maximum * self.START_FRACTION)
+        self.limit = float(min(max(limit, self.minimum), self.maximum))
+        self._in_flight = 0
+        self._baseline: float | None = None
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._condition:
+            while self._in_flight >= int(self.limit):
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self, latency: float, ok: bool) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            self._update(latency, ok)
+            self._condition.notify_all()
+
+    def _update(self, latency: float, ok: bool) -> None:
+        if ok:
+            if self._baseline is None or latency < self._baseline:
+                self._baseline = latency
+            else:
+                self._baseline += (latency - self._baseline) * self.BASELINE_DRIFT
+
+        baseline = self._baseline or 0.0
+        if not ok or latency > baseline * self.LATENCY_TOLERANCE + self.LATENCY_SLACK:
+            now = time.monotonic()
+            if now - self._last_decrease >= baseline:
+                self._last_decrease = now
+                previous = int(self.limit)
+                self.limit = max(self.minimum, self.limit * self.DECREASE)
+                if int(self.limit) != previous:
+                    log.debug(
+                        "Reducing requests in flight to %d (latency %.2fs, ok=%s).",
+                        int(self.limit),
+                        latency,
+                        ok,
+                    )
+        else:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+
+class AsyncAdaptiveLimiter(AdaptiveLimiter):
+    """`AdaptiveLimiter` for coroutines sharing one event loop, used by `--engine async`."""
+
+    def __init__(self, maximum: int, limit: int | None = None, minimum: int = 1) -> None:
+        super().__init__(maximum, limit, minimum)
+        self._async_condition = asyncio.Condition()
+
+    async def acquire_async(self) -> None:
+        async with self._async_condition:
+            await self._async_condition.wait_for(lambda: self._in_flight < int(self.limit))
+            self._in_flight += 1
+
+    async def release_async(self, latency: float, ok: bool) -> None:
+        async with self._async_condition:
+            self._in_flight -= 1
+            self._update(latency, ok)
+            self._async_condition.notify_all()
+
+
+class MirrorSession(Session):
+    """
+    Session shared by the crawl and download threads.
+
+    The connection pool is sized so every worker thread can keep its own connection alive across
+    requests, and every request waits for a slot from `limiter` before it is sent. The slot is held
+    until the response headers arrive, which is the latency the limiter reacts to.
+    """
+
+    def __init__(self, pool_size: int, limiter: AdaptiveLimiter | None = None) -> None:
+        super().__init__()
+        self.limiter = limiter
+        self.headers.update({"User-Agent": "ooi-cruise-data-mirror/1.0"})
+        adapter = HTTPAdapter(pool_maxsize=pool_size, pool_block=True)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def request(
+        self,
+        method: str | bytes,
+        url: str | bytes,
+        *args: Any,
+        **kwargs: Any,
+    ) -> Response:
+        if self.limiter is None:
+            return super().request(method, url, *args, **kwargs)
+
+        self.limiter.acquire()
+        start = time.monotonic()
+        ok = False
+        try:
+            response = super().request(method, url, *args, **kwargs)
+            ok = response.status_code < 500 and response.status_code != 429
+            return response
+        finally:
+            self.limiter.release(time.monotonic() - start, ok)
+
+
+class TransferMetrics:
+    """
+    Thread-safe counters and histograms describing one run, written out with `--metrics-out`.
+
+    Histograms keep their raw observations so the report can include exact quantiles next to the
+    cumulative bucket counts.
+    """
+
+    BUCKETS: dict[str, tuple[float, ...]] = {
+        # Time to fetch (or revalidate) one directory listing.
+        "listing_seconds": (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+        # Time from sending a file request to receiving the response headers.
+        "ttfb_seconds": (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+        # Time to transfer one file, including the time to first byte.
+        "file_seconds": (0.1, 0.5, 1, 5, 10, 30, 60, 300, 1800),
+        "file_bytes": (1e3, 1e4, 1e5, 1e6, 1e7, 1e8, 1e9),
+        "file_throughput_bytes_per_second": (1e4, 1e5, 1e6, 1e7, 1e8, 1e9),
+        # Failed attempts before a file was downloaded or given up on.
+        "file_retries": (0, 1, 2, 3, 5),
+    }
+    QUANTILES = (0.5, 0.9, 0.99)
+
+    def __init__(self) -> None:
+        self.started = datetime.now(timezone.utc)
+        self._start = time.monotonic()
+        self._counters: dict[str, float] = {}
+        self._observations: dict[str, list[float]] = {name: [] for name in self.BUCKETS}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            self._observations[name].append(value)
+
+    def report(self) -> dict[str, Any]:
+        """Return the run summary as a JSON-serializable dict."""
+        with self._lock:
+            counters = dict(sorted(self._counters.items()))
+            observations = {name: sorted(values) for name, values in self._observations.items()}
+
+        histograms: dict[str, Any] = {}
+        for name, values in observations.items():
+            histogram: dict[str, Any] = {
+                "count": len(values),
+                "sum": sum(values),
+                "buckets": {
+                    f"{bound:g}": bisect_right(values, bound) for bound in self.BUCKETS[name]
+                },
+            }
+            if values:
+                histogram["min"] = values[0]
+                histogram["max"] = values[-1]
+                for quantile in self.QUANTILES:
+                    index = min(int(quantile * len(values)), len(values) - 1)
+                    histogram[f"p{quantile * 100:g}"] = values[index]
+            histograms[name] = histogram
+
+        return {
+            "started": self.started.isoformat(),
+            "duration_seconds": time.monotonic() - self._start,
+            "counters": counters,
+            "histograms": histograms,
+        }
+
+    def to_openmetrics(self) -> str:
+        """Render the run summary in the OpenMetrics text format."""
+        report = self.report()
+        prefix = "download_rawdata"
+        lines = [
+            f"# TYPE {prefix}_duration_seconds gauge",
+            f"{prefix}_duration_seconds {report['duration_seconds']}",
+        ]
+        for name, value in report["counters"].items():
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            lines.append(f"{prefix}_{name}_total {value:g}")
+        for name, histogram in report["histograms"].items():
+            lines.append(f"# TYPE {prefix}_{name} histogram")
+            for bound, count in histogram["buckets"].items():
+                lines.append(f'{prefix}_{name}_bucket{{le="{bound}"}} {count}')
+            lines.append(f'{prefix}_{name}_bucket{{le="+Inf"}} {histogram["count"]}')
+            lines.append(f"{prefix}_{name}_sum {histogram['sum']}")
+            lines.append(f"{prefix}_{name}_count {histogram['count']}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path) -> None:
+        """Write the report to `path`, as JSON for a ".json" extension and OpenMetrics otherwise."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix.lower() == ".json":
+            path.write_text(json.dumps(self.report(), indent=2) + "\n", encoding="utf-8")
+        else:
+            path.write_text(self.to_openmetrics(), encoding="utf-8")
+
+
 def is_directory_url(href: str) -> bool:
     """Return True when the href points to a sub-directory (ends with '/')."""
     return href.endswith("/")
@@ -57,66 +335,360 @@ def url_to_relative_path(file_url: str) -> str:
     return remote_path.lstrip("/")
 
 
-def glob_matches(relative_path: str, pattern: str | None) -> bool:
-    if pattern is None:
+class _GlobNode:
+    """One pattern segment in a `GlobTrie`, shared by every pattern with the same prefix."""
+
+    __slots__ = ("segment", "regex", "children", "patterns")
+
+    def __init__(self, segment: str = "") -> None:
+        self.segment = segment
+        # Literal segments are compared as strings, only wildcard segments get a regex.
+        self.regex = (
+            re.compile(fnmatch.translate(segment), re.IGNORECASE)
+            if segment != "**" and any(char in segment for char in "*?[")
+            else None
+        )
+        self.children: dict[str, _GlobNode] = {}
+        # Indices of the patterns that end at this node.
+        self.patterns: list[int] = []
+
+    @property
+    def is_globstar(self) -> bool:
+        return self.segment == "**"
+
+    def accepts(self, segment: str) -> bool:
+        """Return True if this node matches `segment`, which must already be lower-cased."""
+        if self.regex is not None:
+            return self.regex.match(segment) is not None
+        return self.is_globstar or self.segment == segment
+
+
+class GlobTrie:
+    """
+    Case-insensitive glob patterns compiled once, segment by segment, into a trie.
+
+    Patterns sharing leading segments share trie nodes, so a path is tested against all patterns
+    in a single walk of its segments. A '**' segment matches zero or more whole path segments.
+    """
+
+    def __init__(self, patterns: list[str]) -> None:
+        self.patterns = patterns
+        self._root = _GlobNode()
+        for index, pattern in enumerate(patterns):
+            node = self._root
+            for segment in pattern.replace("\\", "/").lower().split("/"):
+                node = node.children.setdefault(segment, _GlobNode(segment))
+            node.patterns.append(index)
+
+    @staticmethod
+    def _expand(nodes: list[_GlobNode]) -> list[_GlobNode]:
+        """Add the '**' children reachable from `nodes` without consuming a segment."""
+        expanded: list[_GlobNode] = []
+        stack = list(nodes)
+        while stack:
+            node = stack.pop()
+            if node in expanded:
+                continue
+            expanded.append(node)
+            globstar = node.children.get("**")
+            if globstar is not None:
+                stack.append(globstar)
+        return expanded
+
+    def _walk(self, segments: list[str]) -> list[_GlobNode]:
+        """Return the nodes reached after matching every one of `segments`."""
+        states = self._expand([self._root])
+        for segment in segments:
+            segment = segment.lower()
+            following: list[_GlobNode] = []
+            for node in states:
+                if node.is_globstar:
+                    following.append(node)
+                following.extend(
+                    child
+                    for child in node.children.values()
+                    if not child.is_globstar and child.accepts(segment)
+                )
+            if not following:
+                return []
+            states = self._expand(following)
+        return states
+
+    def could_contain(self, relative_directory: str) -> bool:
+        """Return True if files below `relative_directory` could match any pattern."""
+        segments = [segment for segment in relative_directory.split("/") if segment]
+        return any(
+            node.is_globstar or node.children for node in self._walk(segments)
+        )
+
+    def match(self, relative_path: str) -> list[int]:
+        """Return the indices of every pattern that `relative_path` matches."""
+        return sorted(
+            index
+            for node in self._walk(relative_path.split("/"))
+            for index in node.patterns
+        )
+
+
+def glob_matches(relative_path: str, patterns: GlobTrie | None) -> bool:
+    """Return True if `relative_path` matches any of `patterns` (or no patterns are given)."""
+    if patterns is None:
         return True
 
-    return fnmatch.fnmatchcase(relative_path.lower(), pattern.lower())
+    return bool(patterns.match(relative_path))
 
 
-def directory_could_match(directory: str, pattern: str) -> bool:
+def directory_could_match(directory: str, patterns: GlobTrie) -> bool:
     """
-    Return True if descending into `directory` could ever yield a file that matches `pattern`.
+    Return True if descending into `directory` could ever yield a file that matches any of
+    `patterns`.
 
-    Walks the leading segments of the pattern against the directory's relative path. Returns
-    `False` only when a segment is provably incompatible so we never prune a directory that might
-    contain matches. A '**' in the pattern always allows further descent.
+    Walks the directory's relative path through the pattern trie. Returns `False` only when every
+    pattern is provably incompatible so we never prune a directory that might contain matches. A
+    '**' segment always allows further descent.
     """
     relative_dir = url_to_relative_path(directory)
     if not relative_dir:
         return True
 
-    pattern_parts = pattern.replace("\\", "/").split("/")
-    directory_parts = relative_dir.rstrip("/").split("/")
+    return patterns.could_contain(relative_dir)
 
-    for i, directory_segment in enumerate(directory_parts):
-        if i >= len(pattern_parts):
-            # Pattern is shallower than the directory, can't match deeper files.
-            return False
-        pattern_segment = pattern_parts[i]
-        if pattern_segment == "**":
-            # The '**' matches everything from here down.
-            return True
 
-        if not fnmatch.fnmatchcase(directory_segment.lower(), pattern_segment.lower()):
-            return False
+class ListingEntry(NamedTuple):
+    """A single row of a directory listing."""
 
-    return True
+    url: str
+    # Size column exactly as printed by the server (e.g. "893", "1.2K", "14M"), if any.
+    size: str | None = None
+    # Last-modified column normalized to ISO-8601 (minute resolution), if any.
+    modified: str | None = None
 
 
-def list_directory(
-    session: Session,
+class HTTPResponse(Protocol):
+    """The part of a `requests` or `httpx` response read by the helpers below."""
+
+    @property
+    def status_code(self) -> int: ...
+
+    @property
+    def headers(self) -> Mapping[str, str]: ...
+
+    @property
+    def text(self) -> str: ...
+
+    @property
+    def content(self) -> bytes: ...
+
+
+def format_apache_size(size: int) -> str:
+    """
+    Format a byte count the way Apache's `mod_autoindex` prints it (`apr_strfsize`), so a local
+    file size can be compared against the rounded size column of a listing.
+    """
+    if size < 973:
+        return str(size)
+    for order in "KMGTPE":
+        remain = size & 1023
+        size >>= 10
+        if size >= 973:
+            continue
+        if size < 9 or (size == 9 and remain < 973):
+            remain = (remain * 5 + 256) // 512
+            if remain >= 10:
+                size, remain = size + 1, 0
+            return f"{size}.{remain}{order}"
+        if remain >= 512:
+            size += 1
+        return f"{size}{order}"
+    return str(size)
+
+
+def size_matches(listed: str, local_size: int) -> bool:
+    """Return True when `local_size` is consistent with the size column of a listing."""
+    if listed.isdigit():
+        return int(listed) == local_size
+    return format_apache_size(local_size) == listed
+
+
+def parse_listing_modified(value: str) -> str | None:
+    """Normalize a listing's last-modified column to ISO-8601, or return `None`."""
+    for format in _LISTING_MODIFIED_FORMATS:
+        try:
+            return datetime.strptime(value, format).isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_listing_details(text: str) -> tuple[str | None, str | None]:
+    """
+    Extract the (size, modified) columns from the text that follows a link in an Apache listing.
+    """
+    match = _LISTING_DETAILS_RE.search(text)
+    if match is None:
+        return None, None
+    size = match.group("size")
+    return (
+        None if size == "-" else size,
+        parse_listing_modified(match.group("modified")),
+    )
+
+
+class ListingCache:
+    """
+    On-disk cache of parsed directory listings, keyed by directory URL.
+
+    Each entry stores the `ETag`/`Last-Modified` validators of the listing response alongside the
+    parsed (directories, files) result. Entries younger than `ttl` seconds are used without any
+    request, older ones are revalidated with a conditional GET so an unchanged listing costs a
+    bodiless 304 and no HTML parsing. With `refresh` set, cached entries are ignored (but still
+    rewritten) so every listing is fetched in full.
+    """
+
+    VERSION = 2
+
+    def __init__(self, path: Path, ttl: float, refresh: bool = False) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.refresh = refresh
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        if refresh or not path.exists():
+            return
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            log.warning("Ignoring unreadable listing cache '%s': %s", path, exc)
+            return
+        if data.get("version") == self.VERSION:
+            for url, entry in data.get("listings", {}).items():
+                entry["directories"] = [ListingEntry(*row) for row in entry["directories"]]
+                entry["files"] = [ListingEntry(*row) for row in entry["files"]]
+                self._entries[url] = entry
+        log.debug("Loaded %d cached listing(s) from '%s'.", len(self._entries), path)
+
+    def get(self, url: str) -> dict[str, Any] | None:
+        if self.refresh:
+            return None
+        with self._lock:
+            return self._entries.get(url)
+
+    def is_fresh(self, entry: dict[str, Any]) -> bool:
+        return time.time() - entry.get("fetched", 0) < self.ttl
+
+    def store(
+        self,
+        url: str,
+        response: HTTPResponse,
+        directories: list[ListingEntry],
+        files: list[ListingEntry],
+    ) -> None:
+        with self._lock:
+            self._entries[url] = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "fetched": time.time(),
+                "directories": directories,
+                "files": files,
+            }
+            self._dirty = True
+
+    def touch(self, url: str) -> None:
+        with self._lock:
+            self._entries[url]["fetched"] = time.time()
+            self._dirty = True
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".part")
+        with self._lock:
+            tmp.write_text(
+                json.dumps({"version": self.VERSION, "listings": self._entries}),
+                encoding="utf-8",
+            )
+            self._dirty = False
+        tmp.replace(self.path)
+        log.debug("Saved %d listing(s) to '%s'.", len(self._entries), self.path)
+
+
+def conditional_headers(entry: dict[str, Any] | None) -> dict[str, str]:
+    """Return the revalidation headers for a cached listing entry."""
+    headers: dict[str, str] = {}
+    if entry is None:
+        return headers
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def parse_listing(url: str, html: str) -> tuple[list[ListingEntry], list[ListingEntry]]:
+    """
+    Parse the HTML of an Apache-style directory listing at `url` and return entries for its
+    sub-directories and files, with absolute URLs and whatever size/last-modified details the
+    listing shows.
+
+    Uses `parse_listing_fast()` and falls back to BeautifulSoup for pages it cannot handle.
+    """
+    parsed = parse_listing_fast(url, html)
+    if parsed is None:
+        log.debug("Listing not recognised, parsing with BeautifulSoup: %s", url)
+        parsed = parse_listing_soup(url, html)
+    return parsed
+
+
+def parse_listing_fast(
     url: str,
-    start_url: str,
-) -> tuple[list[str], list[str]]:
+    html: str,
+) -> tuple[list[ListingEntry], list[ListingEntry]] | None:
     """
-    Fetch an Apache-style directory listing and return absolute URLs of sub-directories and absolute
-    URLs of downloadable files.
+    Single-pass, regex-based parser for the index pages generated by Apache's `mod_autoindex`.
 
-    The `start_url` is the root of the current crawl (used to reject links that escape back above
-    it).
+    Every link is matched together with the rest of its table row or `<pre>` line, which holds the
+    last-modified and size columns. Returns `None` when not every `<a>` tag on the page could be
+    matched (unquoted attributes, unusual markup, ...) so the caller can fall back to a full HTML
+    parser.
     """
-    directories: list[str] = []
-    files: list[str] = []
+    directories: list[ListingEntry] = []
+    files: list[ListingEntry] = []
 
-    try:
-        resp = session.get(url, timeout=30)
-        resp.raise_for_status()
-    except RequestException as exc:
-        log.error("Failed to list %s: %s", url, exc)
-        return directories, files
+    matched = 0
+    for match in _INDEX_LINK_RE.finditer(html):
+        matched += 1
+        href = unescape(match.group("href"))
+
+        if (
+            href in ("../", "/")
+            or href.startswith("?")
+            or "Parent Directory" in match.group("text")
+        ):
+            continue
+
+        absolute = urljoin(url, href)
+        size, modified = parse_listing_details(_TAG_RE.sub(" ", match.group("details")))
+
+        if is_directory_url(href):
+            directories.append(ListingEntry(absolute, None, modified))
+        else:
+            files.append(ListingEntry(absolute, size, modified))
+
+    if matched != len(_ANCHOR_RE.findall(html)):
+        return None
+
+    return directories, files
 
-    soup = BeautifulSoup(resp.text, "html.parser")
+
+def parse_listing_soup(url: str, html: str) -> tuple[list[ListingEntry], list[ListingEntry]]:
+    """BeautifulSoup-based equivalent of `parse_listing_fast()` that accepts any HTML."""
+    directories: list[ListingEntry] = []
+    files: list[ListingEntry] = []
+
+    soup = BeautifulSoup(html, "html.parser")
 
     for anchor in soup.find_all("a", href=True):
         href: str = str(anchor["href"])
@@ -130,118 +702,1000 @@ def list_directory(
 
         # Resolve to absolute URL.
         absolute = urljoin(url, href)
-        # Skip anything that escapes above the crawl root.
-        if not absolute.startswith(start_url):
-            continue
+
+        # The details either live in the following table cells (`HTMLTable` listings) or in the
+        # text right after the link (`<pre>` listings).
+        cell = anchor.find_parent("td")
+        if cell is not None:
+            details = " ".join(
+                sibling.get_text(" ", strip=True)
+                for sibling in cell.find_next_siblings("td")
+            )
+        elif isinstance(anchor.next_sibling, NavigableString):
+            details = str(anchor.next_sibling)
+        else:
+            details = ""
+        size, modified = parse_listing_details(details)
 
         if is_directory_url(href):
-            directories.append(absolute)
+            directories.append(ListingEntry(absolute, None, modified))
         else:
-            files.append(absolute)
+            files.append(ListingEntry(absolute, size, modified))
 
     return directories, files
 
 
-def crawl(
-    session: Session,
+class CrawlState:
+    """
+    Last-modified times of the files seen by earlier runs, used by `--since-last-run` to skip
+    files that have not changed since.
+
+    Directories are never skipped: Apache only moves the time of the directory that gained or lost
+    an entry, not of its parents, so every listing is revalidated instead. Through the listing
+    cache an unchanged listing costs a conditional GET answered with a bodiless 304. A file that
+    failed to download is forgotten, so the next run retries it. Every `full_every` seconds (or
+    with `full`) the previous state is ignored and every matching file is checked against its local
+    copy. The state is tied to the set of targets it was recorded for and is discarded when they
+    change.
+    """
+
+    VERSION = 2
+
+    def __init__(
+        self,
+        path: Path,
+        targets: list[list[str]],
+        full: bool = False,
+        full_every: float = DEFAULT_FULL_WALK_DAYS * 24 * 60 * 60,
+    ) -> None:
+        self.path = path
+        self.targets = targets
+        self.full = True
+        self._previous: dict[str, str] = {}
+        self._seen: dict[str, str] = {}
+        self._failed: set[str] = set()
+        self._full_walk = 0.0
+        self._lock = threading.Lock()
+
+        if not path.exists():
+            return
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            log.warning("Ignoring unreadable crawl state '%s': %s", path, exc)
+            return
+        if data.get("version") != self.VERSION or data.get("targets") != targets:
+            log.info("Crawl state '%s' was recorded for other targets, ignoring it.", path)
+            return
+        self._full_walk = data.get("full_walk", 0.0)
+        if full or time.time() - self._full_walk >= full_every:
+            return
+        self.full = False
+        self._previous = data.get("modified", {})
+        log.debug("Loaded %d last-modified time(s) from '%s'.", len(self._previous), path)
+
+    def is_unchanged(self, entry: ListingEntry) -> bool:
+        """
+        Return True if `entry` was seen with the same last-modified time by the previous run, in
+        which case it is carried over into this run's state.
+        """
+        if entry.modified is None:
+            return False
+        with self._lock:
+            if self._previous.get(entry.url) != entry.modified:
+                return False
+            self._seen[entry.url] = entry.modified
+        return True
+
+    def record(self, entry: ListingEntry) -> None:
+        """Record a file that is now present locally."""
+        if entry.modified is None:
+            return
+        with self._lock:
+            if entry.url not in self._failed:
+                self._seen[entry.url] = entry.modified
+
+    def forget(self, url: str) -> None:
+        """Drop `url` from the state."""
+        with self._lock:
+            self._failed.add(url)
+            self._previous.pop(url, None)
+            self._seen.pop(url, None)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".part")
+        with self._lock:
+            # Entries from the previous run that were neither re-seen nor skipped this time (e.g.
+            # in a directory that failed to list) are kept so they can still be skipped later.
+            modified = {**self._previous, **self._seen}
+            data = {
+                "version": self.VERSION,
+                "targets": self.targets,
+                "full_walk": time.time() if self.full else self._full_walk,
+                "modified": modified,
+            }
+            tmp.write_text(json.dumps(data), encoding="utf-8")
+        tmp.replace(self.path)
+
+
+def cached_listing(
+    url: str, cache: ListingCache | None, metrics: TransferMetrics | None
+) -> tuple[dict[str, Any] | None, tuple[list[ListingEntry], list[ListingEntry]] | None]:
+    """
+    Return the cache entry for the listing at `url`, if any, and its (directories, files) when the
+    entry is fresh enough to be used without a request.
+    """
+    entry = cache.get(url) if cache is not None else None
+    if entry is not None and cache is not None and cache.is_fresh(entry):
+        log.debug("Listing (cached): %s", url)
+        if metrics is not None:
+            metrics.increment("listings_cached")
+        return entry, (entry["directories"], entry["files"])
+    return entry, None
+
+
+def read_listing(
     url: str,
-    glob: str | None = None,
-    *,
-    _start_url: str | None = None,
-) -> list[str]:
+    response: HTTPResponse,
+    entry: dict[str, Any] | None,
+    cache: ListingCache | None,
+    metrics: TransferMetrics | None,
+    start: float,
+) -> tuple[list[ListingEntry], list[ListingEntry]]:
+    """
+    Return the (directories, files) of a successful listing `response`, requested at `start` with
+    the `conditional_headers()` of `entry`: the cached ones after a 304, else the parsed body, which
+    is then stored in the `cache`.
     """
-    Recursively walk the remote directory tree starting at *url* and return
-    a flat list of all file URLs whose relative paths match *glob*.
+    if response.status_code == 304 and entry is not None and cache is not None:
+        log.debug("Listing (not modified): %s", url)
+        cache.touch(url)
+        directories, files = entry["directories"], entry["files"]
+        if metrics is not None:
+            metrics.increment("listings_not_modified")
+    else:
+        directories, files = parse_listing(url, response.text)
+        if cache is not None:
+            cache.store(url, response, directories, files)
+        if metrics is not None:
+            metrics.increment("listings_fetched")
+            metrics.increment("listing_bytes", len(response.content))
+    if metrics is not None:
+        metrics.observe("listing_seconds", time.monotonic() - start)
+    return directories, files
+
+
+def below_root(
+    listing: tuple[list[ListingEntry], list[ListingEntry]], start_url: str
+) -> tuple[list[ListingEntry], list[ListingEntry]]:
+    """Drop the entries of a listing that escape above the crawl root `start_url`."""
+    directories, files = listing
+    return (
+        [directory for directory in directories if directory.url.startswith(start_url)],
+        [file for file in files if file.url.startswith(start_url)],
+    )
+
 
-    Early pruning: if a glob pattern is given and its leading path segments
-    cannot possibly match a directory's relative path, that entire subtree is
-    skipped without being fetched.
+def list_directory(
+    session: Session,
+    url: str,
+    start_url: str,
+    cache: ListingCache | None = None,
+    metrics: TransferMetrics | None = None,
+) -> tuple[list[ListingEntry], list[ListingEntry]]:
     """
-    if _start_url is None:
-        _start_url = url
+    Fetch an Apache-style directory listing and return entries for its sub-directories and
+    downloadable files.
 
-    all_files: list[str] = []
-    directories, files = list_directory(session, url, _start_url)
+    The `start_url` is the root of the current crawl (used to reject links that escape back above
+    it). When a `cache` is given, fresh entries are served from it and stale ones are revalidated
+    with a conditional GET. Raises `RequestException` when the listing cannot be fetched.
+    """
+    entry, listing = cached_listing(url, cache, metrics)
+    if listing is None:
+        start = time.monotonic()
+        try:
+            resp = session.get(url, timeout=30, headers=conditional_headers(entry))
+            resp.raise_for_status()
+        except RequestException:
+            if metrics is not None:
+                metrics.increment("listings_failed")
+            raise
+        listing = read_listing(url, resp, entry, cache, metrics, start)
+    return below_root(listing, start_url)
+
+
+def select_entries(
+    directories: list[ListingEntry],
+    files: list[ListingEntry],
+    patterns: GlobTrie | None,
+    state: CrawlState | None,
+) -> tuple[list[ListingEntry], list[tuple[ListingEntry, list[int]]]]:
+    """
+    Pick the sub-directories of a listing that are worth descending into and the files that match
+    `patterns`, together with the indices of the patterns they match (`[0]` without patterns).
 
-    for file_url in files:
-        relative = url_to_relative_path(file_url)
-        if glob_matches(relative, glob):
-            all_files.append(file_url)
+    Directories no pattern can match are pruned, and so are files `state` has seen unchanged in an
+    earlier run.
+    """
+    selected: list[ListingEntry] = []
+    for directory in directories:
+        if patterns is not None and not directory_could_match(directory.url, patterns):
+            log.debug("Ignoring directory '%s'.", directory.url)
         else:
+            log.debug("Entering directory '%s'.", directory.url)
+            selected.append(directory)
+
+    matches: list[tuple[ListingEntry, list[int]]] = []
+    for file in files:
+        relative = url_to_relative_path(file.url)
+        matched = [0] if patterns is None else patterns.match(relative)
+        if not matched:
             log.debug("Skipping (glob mismatch): %s", relative)
+        elif state is not None and state.is_unchanged(file):
+            log.debug("Unchanged since last run: %s", relative)
+        else:
+            matches.append((file, matched))
 
-    for directory in directories:
-        if glob is not None and not directory_could_match(directory, glob):
-            log.debug("Ignoring directory '%s'.", directory)
-            continue
+    return selected, matches
+
+
+def iter_crawl(
+    session: Session,
+    url: str,
+    patterns: GlobTrie | None = None,
+    *,
+    crawl_workers: int = DEFAULT_CRAWL_WORKERS,
+    cache: ListingCache | None = None,
+    state: CrawlState | None = None,
+    metrics: TransferMetrics | None = None,
+) -> Iterator[tuple[ListingEntry, list[int]]]:
+    """
+    Walk the remote directory tree starting at *url* and yield the listing entry of every file
+    whose relative path matches any of *patterns*, together with the indices of the patterns it
+    matches, as soon as the listing containing it has been fetched. Without patterns every file is
+    yielded with `[0]`.
+
+    Directory listings are fetched on a pool of `crawl_workers` threads, so sibling directories are
+    listed concurrently instead of one round trip at a time. Entries are yielded in the order in
+    which listings complete.
+
+    Early pruning: if patterns are given and no pattern's leading path segments can
+    match a directory's relative path, that entire subtree is skipped without being
+    fetched. Listings are read through `cache` when one is given. With a `state` from
+    an earlier run, files whose last-modified time has not moved are not yielded.
+    """
+    with ThreadPoolExecutor(
+        max_workers=max(crawl_workers, 1),
+        thread_name_prefix="crawl",
+    ) as pool:
+        pending: dict[
+            Future[tuple[list[ListingEntry], list[ListingEntry]]], ListingEntry
+        ] = {
+            pool.submit(list_directory, session, url, url, cache, metrics): ListingEntry(url)
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                listed = pending.pop(future)
+                try:
+                    directories, files = future.result()
+                except RequestException as exc:
+                    log.error("Failed to list %s: %s", listed.url, exc)
+                    continue
+
+                directories, matches = select_entries(directories, files, patterns, state)
+
+                # Queue sub-directories first so listings keep flowing while the caller consumes
+                # the files found here.
+                for directory in directories:
+                    future = pool.submit(
+                        list_directory, session, directory.url, url, cache, metrics
+                    )
+                    pending[future] = directory
 
-        log.debug("Entering directory '%s'.", directory)
-        all_files.extend(crawl(session, directory, glob, _start_url=_start_url))
+                yield from matches
 
-    return all_files
+
+def crawl(
+    session: Session,
+    url: str,
+    glob: str | None = None,
+    *,
+    crawl_workers: int = DEFAULT_CRAWL_WORKERS,
+    cache: ListingCache | None = None,
+) -> list[ListingEntry]:
+    """
+    Run `iter_crawl()` for a single glob to completion and return a flat list of all matching file
+    entries.
+    """
+    patterns = GlobTrie([glob]) if glob is not None else None
+    return [
+        file
+        for file, _ in iter_crawl(
+            session, url, patterns, crawl_workers=crawl_workers, cache=cache
+        )
+    ]
 
 
-def get_local_path(file_url: str, destination: Path, flatten: bool = False) -> Path:
+def get_local_path(
+    file_url: str,
+    destination: Path,
+    flatten: bool = False,
+    compress: bool = False,
+) -> Path:
     """Convert a remote file URL to the corresponding local Path under `destination`.
 
     If `flatten` is True the directory structure is collapsed and path separators are
-    replaced with '__', so all files land directly in `destination`.
+    replaced with '__', so all files land directly in `destination`. If `compress` is True
+    a ".gz" extension is appended, unless the file is compressed already.
     """
     relative = url_to_relative_path(file_url)
     if flatten:
-        return destination / relative.replace("/", "__")
+        relative = relative.replace("/", "__")
+    if compress and not is_compressed(relative):
+        relative += ".gz"
     return destination / relative
 
 
+def is_compressed(name: str) -> bool:
+    return name.lower().endswith(COMPRESSED_SUFFIXES)
+
+
+def is_gzip_encoded(response: HTTPResponse) -> bool:
+    """Return True when the body of `response` is sent gzip-compressed (`Content-Encoding`)."""
+    return response.headers.get("Content-Encoding", "").strip().lower() in ("gzip", "x-gzip")
+
+
+def open_part_file(path: Path, mode: str, compress: bool) -> BinaryIO:
+    """Open a partial download for writing, gzip-compressing what is written when `compress`."""
+    if compress:
+        return gzip.open(path, mode, compresslevel=GZIP_LEVEL)
+    return open(path, mode)
+
+
+class DownloadManifest:
+    """
+    Record of what was downloaded into a destination directory, keyed by local path relative to it.
+
+    Each entry stores the size and last-modified columns of the listing the file was downloaded
+    from plus the number of bytes written, so later runs can decide whether a local file is still
+    current from the listing alone, without a request per file.
+    """
+
+    FILENAME = ".download-manifest.json"
+
+    def __init__(self, destination: Path) -> None:
+        self.destination = destination
+        self.path = destination / self.FILENAME
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        if not self.path.exists():
+            return
+        try:
+            self._entries = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            log.warning("Ignoring unreadable manifest '%s': %s", self.path, exc)
+
+    def _key(self, local: Path) -> str:
+        return local.relative_to(self.destination).as_posix()
+
+    def is_current(self, local: Path, remote: ListingEntry) -> bool:
+        """
+        Return True when `local` exists and matches what the listing reports for `remote`.
+
+        Files recorded in the manifest must match the recorded listing details and byte count.
+        Files without a record (e.g. from before the manifest existed) are accepted when their size
+        is consistent with the listing, and are then adopted into the manifest.
+        """
+        try:
+            local_size = local.stat().st_size
+        except OSError:
+            return False
+
+        with self._lock:
+            entry = self._entries.get(self._key(local))
+        if entry is not None:
+            return (
+                entry.get("size") == remote.size
+                and entry.get("modified") == remote.modified
+                and entry.get("bytes") == local_size
+            )
+
+        if remote.size is None or not size_matches(remote.size, local_size):
+            return False
+        self.record(local, remote)
+        return True
+
+    def record(self, local: Path, remote: ListingEntry) -> None:
+        with self._lock:
+            self._entries[self._key(local)] = {
+                "size": remote.size,
+                "modified": remote.modified,
+                "bytes": local.stat().st_size,
+            }
+            self._dirty = True
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        self.destination.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".part")
+        with self._lock:
+            tmp.write_text(json.dumps(self._entries, indent=1), encoding="utf-8")
+            self._dirty = False
+        tmp.replace(self.path)
+
+
+def read_validator(path: Path) -> str | None:
+    """Return the `If-Range` validator stored next to a partial download, if any."""
+    try:
+        return path.read_text(encoding="utf-8").strip() or None
+    except OSError:
+        return None
+
+
+def write_validator(path: Path, response: HTTPResponse) -> None:
+    """
+    Store the validator of `response` next to the partial download it is being written to, or
+    remove any stale one when the response cannot be resumed later.
+
+    A strong ETag is preferred, then Last-Modified. Responses with a `Content-Encoding` are never
+    resumable because byte ranges would apply to the encoded body.
+    """
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if "Content-Encoding" in response.headers:
+        validator = None
+    elif etag and not etag.startswith("W/"):
+        validator = etag
+    else:
+        validator = last_modified
+
+    if validator:
+        path.write_text(validator, encoding="utf-8")
+    else:
+        path.unlink(missing_ok=True)
+
+
+def content_range_start(response: HTTPResponse) -> int | None:
+    """Return the first byte position of a 206 response's `Content-Range`, if it has one."""
+    match = _CONTENT_RANGE_RE.match(response.headers.get("Content-Range", ""))
+    return int(match.group(1)) if match else None
+
+
+class CannotResume(Exception):
+    """The response to a Range request does not continue the partial download."""
+
+
+class FileDownload:
+    """
+    The steps of downloading one file that do not depend on the HTTP client: whether an existing
+    copy is complete, the headers to resume a partial download, how to take the response, and what
+    is recorded in the manifest and metrics. `download_file()` and `download_file_async()` only
+    send the requests and move the bytes.
+    """
+
+    def __init__(
+        self,
+        remote: ListingEntry,
+        destination: Path,
+        flatten: bool,
+        manifest: DownloadManifest | None,
+        metrics: TransferMetrics | None,
+        compress: bool,
+    ) -> None:
+        self.remote = remote
+        self.url = remote.url
+        self.compress = compress and not is_compressed(remote.url)
+        self.local = get_local_path(
+            remote.url, destination, flatten=flatten, compress=self.compress
+        )
+        self.tmp = self.local.with_suffix(self.local.suffix + ".part")
+        self.tmp_validator = self.tmp.with_suffix(self.tmp.suffix + ".validator")
+        self.manifest = manifest
+        self.metrics = metrics
+        # State of the current attempt.
+        self.offset = 0
+        self.start = 0.0
+        self.received = 0
+
+    def is_complete(self) -> bool | None:
+        """
+        Return whether an existing local copy is complete, or None when only a HEAD request can
+        tell (see `head_matches()`).
+        """
+        if not self.local.exists():
+            return False
+        # The Content-Length of a HEAD request is the uncompressed size, so a ".gz" copy is only
+        # checked against the manifest.
+        if not self.compress and self.remote.size is None and self.remote.modified is None:
+            return None
+        complete = self.manifest is not None and self.manifest.is_current(self.local, self.remote)
+        if complete:
+            log.debug("Skipping (already complete): %s", self.local)
+        return complete
+
+    def head_matches(self, response: HTTPResponse) -> bool:
+        """Return True when the local copy has the `Content-Length` of a HEAD `response`."""
+        size = int(response.headers.get("Content-Length", -1))
+        complete = size > 0 and self.local.stat().st_size == size
+        if complete:
+            log.debug("Skipping (already complete): %s", self.local)
+        return complete
+
+    def begin(self) -> dict[str, str]:
+        """
+        Start an attempt and return its request headers, which resume an earlier partial transfer
+        when it is known which version of the file it belongs to. `If-Range` makes the server send
+        the whole file instead if it has changed.
+        """
+        # A no-op for the destination dir itself when flattened.
+        self.local.parent.mkdir(parents=True, exist_ok=True)
+        self.offset = self.tmp.stat().st_size if self.tmp.exists() else 0
+        validator = None
+        if self.offset and not self.compress:
+            validator = read_validator(self.tmp_validator)
+        headers: dict[str, str] = {}
+        if validator is not None:
+            headers["Range"] = f"bytes={self.offset}-"
+            headers["If-Range"] = validator
+            # Byte ranges of an encoded body would not line up with the decoded partial file.
+            headers["Accept-Encoding"] = "identity"
+        self.start = time.monotonic()
+        self.received = 0
+        return headers
+
+    def accept(self, response: HTTPResponse) -> None:
+        """
+        Check the status of `response` before its body is read. Raises `CannotResume`, after
+        removing the partial file, when the response does not continue it.
+        """
+        if self.metrics is not None:
+            self.metrics.observe("ttfb_seconds", time.monotonic() - self.start)
+        status = response.status_code
+        if status == 416 or (status == 206 and content_range_start(response) != self.offset):
+            # The partial file no longer fits the remote one, start over.
+            self.tmp.unlink(missing_ok=True)
+            self.tmp_validator.unlink(missing_ok=True)
+            raise CannotResume(f"Cannot resume at byte {self.offset} (HTTP {status})")
+
+    def open(self, response: HTTPResponse) -> tuple[BinaryIO, bool]:
+        """
+        Open the partial file for the body of a successful `response`. Returns the file and whether
+        the body should be written raw, i.e. as the gzip-encoded bytes the server sent.
+        """
+        if response.status_code == 206:
+            log.debug("Resuming at byte %d: %s", self.offset, self.local)
+            mode = "ab"
+        else:
+            # The server ignored the range (or the file changed), take the full body.
+            mode = "wb"
+            if not self.compress:
+                write_validator(self.tmp_validator, response)
+        raw = self.compress and is_gzip_encoded(response)
+        return open_part_file(self.tmp, mode, self.compress and not raw), raw
+
+    def finish(self, attempt: int) -> None:
+        """Move the complete partial file into place and record it."""
+        self.tmp.rename(self.local)
+        self.tmp_validator.unlink(missing_ok=True)
+        if self.manifest is not None:
+            self.manifest.record(self.local, self.remote)
+        if self.metrics is not None:
+            elapsed = time.monotonic() - self.start
+            self.metrics.increment("bytes_downloaded", self.received)
+            self.metrics.observe("file_seconds", elapsed)
+            self.metrics.observe("file_bytes", self.received)
+            if elapsed > 0:
+                self.metrics.observe("file_throughput_bytes_per_second", self.received / elapsed)
+            self.metrics.observe("file_retries", attempt - 1)
+        log.info("Downloaded: %s", self.local)
+
+    def fail(self, attempt: int, error: Exception) -> None:
+        """Record a failed attempt, keeping the partial file only if it can be resumed."""
+        log.warning("Attempt %d/%d failed for %s: %s", attempt, RETRY_LIMIT, self.url, error)
+        if self.metrics is not None:
+            self.metrics.increment("bytes_downloaded", self.received)
+            if attempt < RETRY_LIMIT:
+                self.metrics.increment("retries")
+        if self.tmp.exists() and not self.tmp_validator.exists():
+            self.tmp.unlink()
+
+    def give_up(self) -> None:
+        if self.metrics is not None:
+            self.metrics.observe("file_retries", RETRY_LIMIT)
+        log.error("Giving up on '%s'.", self.url)
+
+
 def download_file(
     session: Session,
-    url: str,
+    remote: ListingEntry,
     destination: Path,
     flatten: bool = False,
+    manifest: DownloadManifest | None = None,
+    metrics: TransferMetrics | None = None,
+    compress: bool = False,
 ) -> tuple[str, str]:
     """
-    Download `url` to `destination`, preserving the remote directory structure. Returns (url,
+    Download `remote` to `destination`, preserving the remote directory structure. Returns (url,
     status) where status is 'ok', 'skipped', or 'error'.
-    """
-    local = get_local_path(url, destination, flatten=flatten)
 
-    if local.exists():
+    Whether an existing local file is already complete is decided from the listing details and the
+    `manifest`. Only when the listing has no size column and the file is stored uncompressed does
+    this fall back to a HEAD request.
+
+    With `compress` the file is stored gzip-compressed under a ".gz" name. A body the server sends
+    gzip-encoded is written as received, without decoding and compressing it again. Compressed
+    downloads are not resumed.
+    """
+    download = FileDownload(remote, destination, flatten, manifest, metrics, compress)
+    complete = download.is_complete()
+    if complete is None:
         try:
-            head = session.head(url, timeout=15)
-            size = int(head.headers.get("Content-Length", -1))
-            if size > 0 and local.stat().st_size == size:
-                log.debug("Skipping (already complete): %s", local)
-                return url, "skipped"
+            complete = download.head_matches(session.head(download.url, timeout=15))
         except Exception:
-            pass
-
-    local.parent.mkdir(
-        parents=True, exist_ok=True
-    )  # no-op for the destination dir itself when flattened
-    tmp = local.with_suffix(local.suffix + ".part")
+            complete = False
+    if complete:
+        return download.url, "skipped"
 
     for attempt in range(1, RETRY_LIMIT + 1):
+        headers = download.begin()
         try:
-            with session.get(url, stream=True, timeout=60) as resp:
+            with session.get(download.url, stream=True, timeout=60, headers=headers) as resp:
+                download.accept(resp)
                 resp.raise_for_status()
-                with open(tmp, "wb") as fh:
-                    for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+                fh, raw = download.open(resp)
+                if raw:
+                    chunks = resp.raw.stream(CHUNK_SIZE, decode_content=False)
+                else:
+                    chunks = resp.iter_content(chunk_size=CHUNK_SIZE)
+                with fh:
+                    for chunk in chunks:
                         if chunk:
                             fh.write(chunk)
-            tmp.rename(local)
-            log.info("Downloaded: %s", local)
-            return url, "ok"
-        except requests.RequestException as exc:
-            log.warning(
-                "Attempt %d/%d failed for %s: %s", attempt, RETRY_LIMIT, url, exc
-            )
-            if tmp.exists():
-                tmp.unlink()
+                            download.received += len(chunk)
+            download.finish(attempt)
+            return download.url, "ok"
+        except (requests.RequestException, CannotResume) as exc:
+            download.fail(attempt, exc)
             if attempt < RETRY_LIMIT:
                 time.sleep(RETRY_BACKOFF * attempt)
 
-    log.error("Giving up on '%s'.", url)
-    return url, "error"
+    download.give_up()
+    return download.url, "error"
+
+
+def mirror_threads(
+    base_url: str,
+    targets: list[tuple[str | None, Path]],
+    patterns: GlobTrie,
+    *,
+    workers: int,
+    crawl_workers: int,
+    max_in_flight: int,
+    adaptive: bool,
+    flatten: bool,
+    compress: bool,
+    cache: ListingCache | None,
+    state: CrawlState | None,
+    manifests: dict[Path, DownloadManifest],
+    metrics: TransferMetrics | None,
+    record: Callable[[ListingEntry, str], None],
+) -> int:
+    """
+    Crawl on `crawl_workers` threads and download on `workers` threads (`--engine threads`). Calls
+    `record` with the status of every file and returns the number of files found.
+    """
+    limiter = AdaptiveLimiter(maximum=max_in_flight) if adaptive else None
+    # Every crawl and download thread shares one session, so the pool gets a connection per thread.
+    session = MirrorSession(workers + crawl_workers, limiter)
+    found = 0
+
+    def done(remote: ListingEntry, future: Future[tuple[str, str]]) -> None:
+        try:
+            _, status = future.result()
+        except Exception as exc:
+            log.error("Unexpected error while downloading: %s", exc)
+            status = "error"
+        record(remote, status)
+
+    with ThreadPoolExecutor(
+        max_workers=workers,
+        thread_name_prefix="download",
+    ) as pool:
+        for remote, matched in iter_crawl(
+            session,
+            base_url,
+            patterns,
+            crawl_workers=crawl_workers,
+            cache=cache,
+            state=state,
+            metrics=metrics,
+        ):
+            for index in matched:
+                _, destination = targets[index]
+                found += 1
+                future = pool.submit(
+                    download_file,
+                    session,
+                    remote,
+                    destination,
+                    flatten,
+                    manifests[destination],
+                    metrics,
+                    compress,
+                )
+                future.add_done_callback(partial(done, remote))
+
+        log.info("Crawl finished, found %d file(s) to download.", found)
+        if cache is not None:
+            cache.save()
+
+    if limiter is not None:
+        log.debug("Requests in flight at end of run: %d", int(limiter.limit))
+    return found
+
+
+async def send_async(
+    client: "httpx.AsyncClient",
+    limiter: AsyncAdaptiveLimiter | None,
+    method: str,
+    url: str,
+    *,
+    stream: bool = False,
+    **kwargs: Any,
+) -> "httpx.Response":
+    """
+    Send one request on `client` once `limiter` has a slot for it, the async counterpart of
+    `MirrorSession.request`. The slot is held until the response headers arrive.
+    """
+    request = client.build_request(method, url, **kwargs)
+    if limiter is None:
+        return await client.send(request, stream=stream)
+
+    await limiter.acquire_async()
+    start = time.monotonic()
+    ok = False
+    try:
+        response = await client.send(request, stream=stream)
+        ok = response.status_code < 500 and response.status_code != 429
+        return response
+    finally:
+        await limiter.release_async(time.monotonic() - start, ok)
+
+
+async def list_directory_async(
+    client: "httpx.AsyncClient",
+    limiter: AsyncAdaptiveLimiter | None,
+    url: str,
+    start_url: str,
+    cache: ListingCache | None = None,
+    metrics: TransferMetrics | None = None,
+) -> tuple[list[ListingEntry], list[ListingEntry]]:
+    """
+    Async counterpart of `list_directory()`. Raises `httpx.HTTPError` when the listing cannot be
+    fetched.
+    """
+    import httpx
+
+    entry, listing = cached_listing(url, cache, metrics)
+    if listing is None:
+        start = time.monotonic()
+        try:
+            resp = await send_async(
+                client, limiter, "GET", url, timeout=30, headers=conditional_headers(entry)
+            )
+            # Unlike `requests`, httpx treats a 304 as an error.
+            if resp.status_code != 304:
+                resp.raise_for_status()
+        except httpx.HTTPError:
+            if metrics is not None:
+                metrics.increment("listings_failed")
+            raise
+        listing = read_listing(url, resp, entry, cache, metrics, start)
+    return below_root(listing, start_url)
+
+
+async def iter_crawl_async(
+    client: "httpx.AsyncClient",
+    limiter: AsyncAdaptiveLimiter | None,
+    url: str,
+    patterns: GlobTrie | None = None,
+    *,
+    max_listings: int = DEFAULT_CRAWL_WORKERS,
+    cache: ListingCache | None = None,
+    state: CrawlState | None = None,
+    metrics: TransferMetrics | None = None,
+) -> AsyncIterator[tuple[ListingEntry, list[int]]]:
+    """
+    Async counterpart of `iter_crawl()`. Every listing that can be fetched is queued right away,
+    and up to `max_listings` of them are requested at once.
+    """
+    import httpx
+
+    listings = asyncio.Semaphore(max(max_listings, 1))
+
+    async def list_one(directory: ListingEntry) -> tuple[list[ListingEntry], list[ListingEntry]]:
+        async with listings:
+            return await list_directory_async(client, limiter, directory.url, url, cache, metrics)
+
+    def list_task(directory: ListingEntry) -> "asyncio.Task[Any]":
+        return asyncio.create_task(list_one(directory))
+
+    pending = {list_task(ListingEntry(url)): ListingEntry(url)}
+    while pending:
+        done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            listed = pending.pop(task)
+            try:
+                directories, files = task.result()
+            except httpx.HTTPError as exc:
+                log.error("Failed to list %s: %s", listed.url, exc)
+                continue
+
+            directories, matches = select_entries(directories, files, patterns, state)
+            for directory in directories:
+                pending[list_task(directory)] = directory
+            for match in matches:
+                yield match
+
+
+async def download_file_async(
+    client: "httpx.AsyncClient",
+    limiter: AsyncAdaptiveLimiter | None,
+    remote: ListingEntry,
+    destination: Path,
+    flatten: bool = False,
+    manifest: DownloadManifest | None = None,
+    metrics: TransferMetrics | None = None,
+    compress: bool = False,
+) -> tuple[str, str]:
+    """
+    Async counterpart of `download_file()`, with the same skip, resume, retry and compression
+    behaviour. The file is opened, written and compressed in worker threads so disk and gzip work
+    never stalls the other transfers on the event loop.
+    """
+    import httpx
+
+    download = FileDownload(remote, destination, flatten, manifest, metrics, compress)
+    complete = download.is_complete()
+    if complete is None:
+        try:
+            head = await send_async(client, limiter, "HEAD", download.url, timeout=15)
+            complete = download.head_matches(head)
+        except Exception:
+            complete = False
+    if complete:
+        return download.url, "skipped"
+
+    for attempt in range(1, RETRY_LIMIT + 1):
+        headers = download.begin()
+        try:
+            resp = await send_async(
+                client, limiter, "GET", download.url, stream=True, timeout=60, headers=headers
+            )
+            try:
+                download.accept(resp)
+                resp.raise_for_status()
+                fh, raw = await asyncio.to_thread(download.open, resp)
+                try:
+                    if raw:
+                        chunks = resp.aiter_raw(chunk_size=CHUNK_SIZE)
+                    else:
+                        chunks = resp.aiter_bytes(chunk_size=CHUNK_SIZE)
+                    async for chunk in chunks:
+                        await asyncio.to_thread(fh.write, chunk)
+                        download.received += len(chunk)
+                finally:
+                    await asyncio.to_thread(fh.close)
+            finally:
+                await resp.aclose()
+            download.finish(attempt)
+            return download.url, "ok"
+        except (httpx.HTTPError, CannotResume) as exc:
+            download.fail(attempt, exc)
+            if attempt < RETRY_LIMIT:
+                await asyncio.sleep(RETRY_BACKOFF * attempt)
+
+    download.give_up()
+    return download.url, "error"
+
+
+async def mirror_async(
+    base_url: str,
+    targets: list[tuple[str | None, Path]],
+    patterns: GlobTrie,
+    *,
+    max_in_flight: int,
+    adaptive: bool,
+    flatten: bool,
+    compress: bool,
+    cache: ListingCache | None,
+    state: CrawlState | None,
+    manifests: dict[Path, DownloadManifest],
+    metrics: TransferMetrics | None,
+    record: Callable[[ListingEntry, str], None],
+) -> int:
+    """
+    Crawl and download on a single event loop with one HTTP/2 client (`--engine async`). Calls
+    `record` with the status of every file and returns the number of files found.
+    """
+    import httpx
+
+    # httpx logs every request at INFO, which would drown out the per-file lines.
+    for name in ("httpx", "httpcore", "h2", "hpack"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    try:
+        import h2  # noqa: F401
+
+        http2 = True
+    except ImportError:
+        log.warning("The 'h2' package is not installed, falling back to HTTP/1.1.")
+        http2 = False
+
+    limiter = AsyncAdaptiveLimiter(maximum=max_in_flight) if adaptive else None
+    # Listings and downloads get separate shares of the connection pool, so files queued as soon as
+    # they are found never take every connection from the listings that find more of them.
+    max_listings = max(math.ceil(max_in_flight * ASYNC_LISTING_SHARE), 1)
+    max_downloads = max(max_in_flight - max_listings, 1)
+    downloads = asyncio.Semaphore(max_downloads)
+    found = 0
+
+    async def download(remote: ListingEntry, destination: Path) -> None:
+        async with downloads:
+            try:
+                _, status = await download_file_async(
+                    client,
+                    limiter,
+                    remote,
+                    destination,
+                    flatten,
+                    manifests[destination],
+                    metrics,
+                    compress,
+                )
+            except Exception as exc:
+                log.error("Unexpected error while downloading: %s", exc)
+                status = "error"
+        record(remote, status)
+
+    async with httpx.AsyncClient(
+        http2=http2,
+        follow_redirects=True,
+        headers={"User-Agent": "ooi-cruise-data-mirror/1.0"},
+        limits=httpx.Limits(max_connections=max_listings + max_downloads),
+    ) as client:
+        tasks: set[asyncio.Task[None]] = set()
+        async for remote, matched in iter_crawl_async(
+            client,
+            limiter,
+            base_url,
+            patterns,
+            max_listings=max_listings,
+            cache=cache,
+            state=state,
+            metrics=metrics,
+        ):
+            for index in matched:
+                _, destination = targets[index]
+                found += 1
+                task = asyncio.create_task(download(remote, destination))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+        log.info("Crawl finished, found %d file(s) to download.", found)
+        if cache is not None:
+            cache.save()
+        await asyncio.gather(*tasks)
+
+    if limiter is not None:
+        log.debug("Requests in flight at end of run: %d", int(limiter.limit))
+    return found
 
 
 def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
@@ -256,11 +1710,16 @@ examples:
   # Download summary .csv files for all Global cruises.
   ./download_rawdata.py 'cruise_data/Cabled/*/Water_Sampling/*Discrete_Summary.csv'
 
+  # Download .cnv and summary .csv files into separate directories with a single crawl.
+  ./download_rawdata.py \\
+    --target 'cruise_data/Cabled/*/Water_Sampling/CTD Data/*.cnv' ctd-casts \\
+    --target 'cruise_data/Cabled/*/Water_Sampling/*Discrete_Summary.csv' summaries
+
 glob pattern notes:
   Patterns are matched against the path relative to the archive root.
   Matching is case-insensitive.
     *      matches any characters within a single path segment
-    **     matches any characters including path separators
+    **     as a whole segment, matches zero or more path segments
     ?      matches any single character
     [seq]  matches any character in seq
         """,
@@ -283,6 +1742,27 @@ glob pattern notes:
         metavar="DIR",
         help=f"Local destination directory (default: {DEFAULT_DESTINATION})",
     )
+    parser.add_argument(
+        "--target",
+        nargs=2,
+        action="append",
+        default=[],
+        metavar=("GLOB", "DIR"),
+        dest="targets",
+        help=(
+            "Download files matching GLOB into DIR. Repeat to fetch several patterns in one crawl "
+            "of the archive. Can be combined with the positional GLOB and --destination."
+        ),
+    )
+    parser.add_argument(
+        "--base-url",
+        default=BASE_URL,
+        metavar="URL",
+        help=(
+            "Root of the archive to mirror, e.g. a local stand-in for benchmarking. Its path "
+            f"should end in '/files/' like the real one. (default: {BASE_URL})"
+        ),
+    )
     parser.add_argument(
         "--workers",
         type=int,
@@ -290,6 +1770,45 @@ glob pattern notes:
         metavar="N",
         help=f"Number of parallel download threads (default: {DEFAULT_WORKERS})",
     )
+    parser.add_argument(
+        "--crawl-workers",
+        type=int,
+        default=DEFAULT_CRAWL_WORKERS,
+        metavar="N",
+        help=(
+            "Number of directory listings fetched concurrently while crawling "
+            f"(default: {DEFAULT_CRAWL_WORKERS})"
+        ),
+    )
+    parser.add_argument(
+        "--engine",
+        choices=("threads", "async"),
+        default="threads",
+        help=(
+            "How requests are run. 'threads' uses pools of --crawl-workers and --workers threads, "
+            "'async' runs the crawl and all downloads on a single event loop with an HTTP/2 "
+            "client (requires httpx[http2]), which keeps many more requests in flight for less "
+            "memory. (default: threads)"
+        ),
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=None,
+        metavar="N",
+        help=(
+            "Upper bound for the adaptive number of requests in flight. (default: --workers "
+            f"plus --crawl-workers, or {DEFAULT_ASYNC_IN_FLIGHT} with --engine async)"
+        ),
+    )
+    parser.add_argument(
+        "--no-adaptive",
+        action="store_true",
+        help=(
+            "Do not adapt the number of requests in flight to server latency and errors, "
+            "every worker thread sends requests freely."
+        ),
+    )
     parser.add_argument(
         "--flatten",
         action="store_true",
@@ -298,6 +1817,90 @@ glob pattern notes:
             "relative paths with '__' to form the filename."
         ),
     )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help=(
+            "Store files gzip-compressed with a '.gz' extension appended. Bodies the server sends "
+            "gzip-encoded are written as received. Compressed downloads are not resumed."
+        ),
+    )
+    parser.add_argument(
+        "--listing-cache",
+        type=Path,
+        default=DEFAULT_LISTING_CACHE,
+        metavar="FILE",
+        help=(
+            "File used to cache parsed directory listings between runs "
+            f"(default: {DEFAULT_LISTING_CACHE})"
+        ),
+    )
+    parser.add_argument(
+        "--listing-ttl",
+        type=float,
+        default=DEFAULT_LISTING_TTL,
+        metavar="SECONDS",
+        help=(
+            "Age below which a cached listing is used without contacting the server. Older "
+            "listings are revalidated with a conditional GET. (default: "
+            f"{DEFAULT_LISTING_TTL:.0f})"
+        ),
+    )
+    parser.add_argument(
+        "--refresh-listings",
+        action="store_true",
+        help="Ignore cached listings and fetch every directory listing in full.",
+    )
+    parser.add_argument(
+        "--no-listing-cache",
+        action="store_true",
+        help="Neither read nor write the listing cache.",
+    )
+    parser.add_argument(
+        "--since-last-run",
+        action="store_true",
+        help=(
+            "Only queue files that are new or changed since the last run with this option. Every "
+            "listing is revalidated (ignoring --listing-ttl), so unchanged directories cost a "
+            "conditional GET."
+        ),
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help=(
+            "With --since-last-run, ignore what earlier runs have seen, check every matching file "
+            "against its local copy and fetch every listing in full."
+        ),
+    )
+    parser.add_argument(
+        "--full-every",
+        type=float,
+        default=DEFAULT_FULL_WALK_DAYS,
+        metavar="DAYS",
+        help=(
+            "With --since-last-run, make a run a --full one when the last full one is older "
+            f"than this. (default: {DEFAULT_FULL_WALK_DAYS:.0f})"
+        ),
+    )
+    parser.add_argument(
+        "--state-file",
+        type=Path,
+        default=DEFAULT_STATE_FILE,
+        metavar="FILE",
+        help=f"File recording what --since-last-run has seen (default: {DEFAULT_STATE_FILE})",
+    )
+    parser.add_argument(
+        "--metrics-out",
+        type=Path,
+        default=None,
+        metavar="FILE",
+        help=(
+            "Write transfer metrics (listing latency, time to first byte, per-file size, "
+            "duration, throughput and retries) to FILE at the end of the run, as JSON for a "
+            ".json extension and in the OpenMetrics text format otherwise."
+        ),
+    )
     parser.add_argument(
         "--verbose",
         action="store_true",
@@ -312,42 +1915,133 @@ def main(argv: list[str] | None = None) -> int:
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
 
-    log.info("Start URL  : %s", BASE_URL)
-    log.info("Destination: %s", args.destination.resolve())
-    log.info("Workers    : %d", args.workers)
-    if args.glob:
-        log.info("Glob filter: %s", args.glob)
+    # Each (glob, destination) pair is a target, all of them are served by a single crawl.
+    targets: list[tuple[str | None, Path]] = [
+        (glob, Path(destination)) for glob, destination in args.targets
+    ]
+    if args.glob is not None or not targets:
+        targets.insert(0, (args.glob, args.destination))
+
+    # A target without a glob takes every file.
+    patterns = GlobTrie([glob or "**" for glob, _ in targets])
+
+    log.info("Start URL  : %s", args.base_url)
+    for glob, destination in targets:
+        log.info("Target     : %s -> %s", glob or "**", destination.resolve())
+    if args.engine == "async":
+        log.info("Engine     : async")
+        max_in_flight = args.max_in_flight or DEFAULT_ASYNC_IN_FLIGHT
+    else:
+        log.info("Workers    : %d", args.workers)
+        log.info("Crawlers   : %d", args.crawl_workers)
+        max_in_flight = args.max_in_flight or args.workers + args.crawl_workers
+    if not args.no_adaptive:
+        log.info("In flight  : adaptive, at most %d", max_in_flight)
     if args.flatten:
         log.info("Flatten    : enabled")
+    if args.compress:
+        log.info("Compress   : enabled")
+    if not args.no_listing_cache:
+        log.info("Listings   : %s", args.listing_cache)
+
+    state: CrawlState | None = None
+    if args.since_last_run:
+        state = CrawlState(
+            args.state_file,
+            [[glob or "**", str(destination)] for glob, destination in targets],
+            full=args.full,
+            full_every=args.full_every * 24 * 60 * 60,
+        )
+        log.info("Since last : %s%s", args.state_file, " (full walk)" if state.full else "")
+
+    cache: ListingCache | None = None
+    if not args.no_listing_cache:
+        # Files deeper down do not move a directory's time, so every listing is revalidated.
+        cache = ListingCache(
+            args.listing_cache,
+            ttl=0 if state is not None else args.listing_ttl,
+            refresh=args.refresh_listings or (state is not None and state.full),
+        )
+
+    metrics = TransferMetrics() if args.metrics_out is not None else None
 
-    session = requests.Session()
-    session.headers.update({"User-Agent": "ooi-cruise-data-mirror/1.0"})
+    counts: dict[str, int] = {"ok": 0, "skipped": 0, "error": 0}
+    counts_lock = threading.Lock()
+
+    def record(remote: ListingEntry, status: str) -> None:
+        if state is not None:
+            if status == "error":
+                state.forget(remote.url)
+            else:
+                state.record(remote)
+        if metrics is not None:
+            metrics.increment(f"files_{status}")
+        with counts_lock:
+            counts[status] = counts.get(status, 0) + 1
+            processed = sum(counts.values())
+        if processed % PROGRESS_INTERVAL == 0:
+            log.info("Progress: %d file(s) processed.", processed)
 
-    log.info("Crawling remote directory tree.")
-    file_urls = crawl(session, BASE_URL, glob=args.glob)
-    log.info("Found %d file(s) to download.", len(file_urls))
+    manifests = {destination: DownloadManifest(destination) for _, destination in targets}
 
-    if not file_urls:
-        log.warning("No files found, nothing to do.")
+    # Files are submitted for download as soon as the crawler finds them, so downloads work through
+    # the first directories while later listings are still being fetched.
+    log.info("Crawling remote directory tree and downloading matches as they are found.")
+    if args.engine == "async":
+        try:
+            import httpx  # noqa: F401
+        except ImportError:
+            log.error("--engine async requires httpx, install it with: pip install 'httpx[http2]'")
+            return 1
+        found = asyncio.run(
+            mirror_async(
+                args.base_url,
+                targets,
+                patterns,
+                max_in_flight=max_in_flight,
+                adaptive=not args.no_adaptive,
+                flatten=args.flatten,
+                compress=args.compress,
+                cache=cache,
+                state=state,
+                manifests=manifests,
+                metrics=metrics,
+                record=record,
+            )
+        )
+    else:
+        found = mirror_threads(
+            args.base_url,
+            targets,
+            patterns,
+            workers=args.workers,
+            crawl_workers=args.crawl_workers,
+            max_in_flight=max_in_flight,
+            adaptive=not args.no_adaptive,
+            flatten=args.flatten,
+            compress=args.compress,
+            cache=cache,
+            state=state,
+            manifests=manifests,
+            metrics=metrics,
+            record=record,
+        )
+
+    for manifest in manifests.values():
+        manifest.save()
+    if state is not None:
+        state.save()
+    if metrics is not None:
+        metrics.write(args.metrics_out)
+        log.info("Metrics    : %s", args.metrics_out)
+
+    if not found:
+        if state is not None:
+            log.info("Nothing new since the last run.")
+        else:
+            log.warning("No files found, nothing to do.")
         return 0
 
-    counts: dict[str, int] = {"ok": 0, "skipped": 0, "error": 0}
-
-    with ThreadPoolExecutor(max_workers=args.workers) as pool:
-        futures = {
-            pool.submit(
-                download_file,
-                session,
-                url,
-                args.destination,
-                args.flatten,
-            ): url
-            for url in file_urls
-        }
-        for future in as_completed(futures):
-            _, status = future.result()
-            counts[status] = counts.get(status, 0) + 1
-
     log.info(
         "Done. downloaded=%d  skipped=%d  errors=%d",
         counts["ok"],
@@ -7,7 +7,7 @@
 #   - source-data/summaries/ (for *Discrete_Summary.csv files)
 #
 # Usage:
-#   ./refresh-discrete-data.sh [TYPE...] [--verbose]
+#   ./refresh-discrete-data.sh [TYPE...] [--compress] [--verbose]
 #
 # TYPE (optional, repeatable):
 #   ctd-cast   Refresh CTD cast samples (ctd-cast-samples.csv)
@@ -16,6 +16,7 @@
 #   When no TYPE is given, both are refreshed.
 #
 # Options forwarded to download_rawdata.py:
+#   --compress  Store the source files gzip-compressed (.cnv.gz, .csv.gz).
 #   --verbose   Enable DEBUG-level logging in the download step.
 
 set -euo pipefail
@@ -33,8 +34,8 @@ for arg in "$@"; do
         ctd-cast|summary)
             TYPES+=("$arg")
             ;;
-        --verbose)
-            DOWNLOAD_ARGS+=("--verbose")
+        --compress|--verbose)
+            DOWNLOAD_ARGS+=("$arg")
             ;;
         -h|--help)
             sed -n '2,/^[^#]/{ /^#/{ s/^# \{0,1\}//; p }; /^[^#]/q }' "$0"
@@ -42,7 +43,7 @@ for arg in "$@"; do
             ;;
         *)
             echo "Unknown argument: $arg" >&2
-            echo "Usage: $0 [ctd-cast] [summary] [--verbose]" >&2
+            echo "Usage: $0 [ctd-cast] [summary] [--compress] [--verbose]" >&2
             exit 1
             ;;
     esac
@@ -53,57 +54,72 @@ if [ ${#TYPES[@]} -eq 0 ]; then
     TYPES=(ctd-cast summary)
 fi
 
-refresh_ctd_cast() {
-    local source="$DISCRETE_DIRECTORY/source-data/ctd-casts"
-    local output="$DISCRETE_DIRECTORY/ctd-cast-samples.csv"
-    local glob="cruise_data/Cabled/*/Water_Sampling/CTD Data/*.cnv"
+CTD_CAST_SOURCE="$DISCRETE_DIRECTORY/source-data/ctd-casts"
+CTD_CAST_OUTPUT="$DISCRETE_DIRECTORY/ctd-cast-samples.csv"
+CTD_CAST_GLOB="cruise_data/Cabled/*/Water_Sampling/CTD Data/*.cnv"
+CTD_CAST_CACHE="$HOME/.cache/ooi-rawdata/ctd-casts"
+
+SUMMARY_SOURCE="$DISCRETE_DIRECTORY/source-data/summaries"
+SUMMARY_OUTPUT="$DISCRETE_DIRECTORY/summary-samples.csv"
+SUMMARY_GLOB="cruise_data/Cabled/*/Water_Sampling/*Discrete_Summary.csv"
+
+REFRESH_CTD_CAST=false
+REFRESH_SUMMARY=false
+for type in "${TYPES[@]}"; do
+    case "$type" in
+        ctd-cast) REFRESH_CTD_CAST=true ;;
+        summary)  REFRESH_SUMMARY=true  ;;
+    esac
+done
 
-    echo "==> [ctd-cast] Downloading .cnv files into '$source' ..."
+# CTD cast stations are resolved from the summary samples, so collect those first if missing.
+if $REFRESH_CTD_CAST && [ ! -f "$SUMMARY_OUTPUT" ]; then
+    echo "==> [ctd-cast] summary-samples.csv not found at '$SUMMARY_OUTPUT', refreshing it first ..."
+    REFRESH_SUMMARY=true
+fi
+
+# Download the source files of every requested type with a single crawl of the archive.
+download() {
+    local targets=()
+    if $REFRESH_CTD_CAST; then
+        targets+=(--target "$CTD_CAST_GLOB" "$CTD_CAST_SOURCE")
+    fi
+    if $REFRESH_SUMMARY; then
+        targets+=(--target "$SUMMARY_GLOB" "$SUMMARY_SOURCE")
+    fi
+
+    echo "==> Downloading source files ..."
     python "$DOWNLOAD_SCRIPT" \
-        "$glob" \
-        --destination "$source" \
+        "${targets[@]}" \
         --flatten \
         "${DOWNLOAD_ARGS[@]+"${DOWNLOAD_ARGS[@]}"}"
+}
 
-    local summary="$DISCRETE_DIRECTORY/summary-samples.csv"
-    if [ ! -f "$summary" ]; then
-        echo "==> [ctd-cast] summary-samples.csv not found at '$summary', refreshing it first ..."
-        refresh_summary
-    fi
-
-    echo "==> [ctd-cast] Parsing .cnv files into '$output' ..."
+refresh_ctd_cast() {
+    echo "==> [ctd-cast] Parsing .cnv files into '$CTD_CAST_OUTPUT' ..."
     python "$SCRIPT_DIRECTORY/collect_discrete_ctd_cast_samples.py" \
-        "$source" \
-        --summary-samples "$summary" \
+        "$CTD_CAST_SOURCE" \
+        --summary-samples "$SUMMARY_OUTPUT" \
         --downsample-casts 200 \
         --downsample-by depth \
         --downsample-select average \
-        --out "$output"
-    echo "==> [ctd-cast] Done. Output written to '$output'."
+        --cache "$CTD_CAST_CACHE" \
+        --out "$CTD_CAST_OUTPUT"
+    echo "==> [ctd-cast] Done. Output written to '$CTD_CAST_OUTPUT'."
 }
 
 refresh_summary() {
-    local source="$DISCRETE_DIRECTORY/source-data/summaries"
-    local output="$DISCRETE_DIRECTORY/summary-samples.csv"
-    local glob="cruise_data/Cabled/*/Water_Sampling/*Discrete_Summary.csv"
-
-    echo "==> [summary] Downloading discrete summary CSV files into '$source' ..."
-    python "$DOWNLOAD_SCRIPT" \
-        "$glob" \
-        --destination "$source" \
-        --flatten \
-        "${DOWNLOAD_ARGS[@]+"${DOWNLOAD_ARGS[@]}"}"
-
-    echo "==> [summary] Collecting summary CSVs into '$output' ..."
+    echo "==> [summary] Collecting summary CSVs into '$SUMMARY_OUTPUT' ..."
     python "$SCRIPT_DIRECTORY/collect_discrete_summary_samples.py" \
-        "$source" \
-        --out "$output"
-    echo "==> [summary] Done. Output written to '$output'."
+        "$SUMMARY_SOURCE" \
+        --out "$SUMMARY_OUTPUT"
+    echo "==> [summary] Done. Output written to '$SUMMARY_OUTPUT'."
 }
 
-for type in "${TYPES[@]}"; do
-    case "$type" in
-        ctd-cast) refresh_ctd_cast ;;
-        summary)  refresh_summary  ;;
-    esac
-done
+download
+if $REFRESH_SUMMARY; then
+    refresh_summary
+fi
+if $REFRESH_CTD_CAST; then
+    refresh_ctd_cast
+fi
@@ -0,0 +1,70 @@
+"""Tests of the downsampling helpers of `scripts/collect_discrete_ctd_cast_samples.py`."""
+
+from __future__ import annotations
+
+import math
+
+import numpy as np
+
+from collect_discrete_ctd_cast_samples import BinAverager, DataBlock
+
+
+def baseline_averages(
+    rows: list[list[float | str]], bins: list[int]
+) -> list[list[float | str]]:
+    """
+    The averages of the original implementation: `sum()` over the numeric cells of each bin in row
+    order, or else the text of the bin's first row.
+    """
+    groups: dict[int, list[list[float | str]]] = {}
+    for row, bin_index in zip(rows, bins):
+        groups.setdefault(bin_index, []).append(row)
+
+    averages: list[list[float | str]] = []
+    for bin_index in sorted(groups):
+        group = groups[bin_index]
+        average = list(group[0])
+        for column in range(len(average)):
+            values = [row[column] for row in group if isinstance(row[column], float)]
+            if values:
+                average[column] = sum(values) / len(values)
+        averages.append(average)
+    return averages
+
+
+def make_block(rows: list[list[float | str]]) -> DataBlock:
+    values = np.array(
+        [[math.nan if isinstance(cell, str) else cell for cell in row] for row in rows]
+    )
+    text = {
+        (row_index, column): cell
+        for row_index, row in enumerate(rows)
+        for column, cell in enumerate(row)
+        if isinstance(cell, str)
+    }
+    return DataBlock(values, text)
+
+
+def test_bin_averager_matches_sum() -> None:
+    generator = np.random.default_rng(0)
+    # Values of very different magnitudes, so that the compensation of `sum()` matters.
+    values = generator.normal(size=(500, 3)) * 10.0 ** generator.integers(-8, 17, size=(500, 3))
+    rows: list[list[float | str]] = values.tolist()
+    rows[3][1] = "bad"
+    rows[7] = ["x", "y", "z"]
+    rows[100:104] = [[1e16, 1.0, -1e16], [1.0, 1e100, 1.0], [-1e16, -1e100, 1e16], [1.0, 1.0, 1.0]]
+    bins = generator.integers(0, 40, size=len(rows)).tolist()
+    # A bin holding only text keeps the text of its first row.
+    bins[7] = 40
+
+    averager = BinAverager(41, 3)
+    for start in range(0, len(rows), 128):
+        block = make_block(rows[start : start + 128])
+        block_bins = np.array(bins[start : start + 128])
+        selected = np.flatnonzero(block_bins % 5 != 4)
+        averager.add(block, selected, block_bins[selected])
+
+    kept = [(row, bin_index) for row, bin_index in zip(rows, bins) if bin_index % 5 != 4]
+    expected = baseline_averages([row for row, _ in kept], [bin_index for _, bin_index in kept])
+    assert averager.averages() == expected
+    assert ["x", "y", "z"] in expected
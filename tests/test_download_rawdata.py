@@ -0,0 +1,211 @@
+"""Tests of the listing, matching and download helpers of `scripts/download_rawdata.py`."""
+
+from __future__ import annotations
+
+import asyncio
+import fnmatch
+import json
+from collections.abc import Iterator
+from pathlib import Path
+
+import httpx
+import pytest
+import requests
+
+import download_rawdata
+from download_rawdata import (
+    DownloadManifest,
+    GlobTrie,
+    ListingEntry,
+    download_file,
+    download_file_async,
+    format_apache_size,
+    parse_listing_fast,
+    parse_listing_soup,
+)
+from fake_archive import ArchiveServer, ArchiveShape, start_server
+
+FIXTURES_DIRECTORY = Path(__file__).resolve().parent.parent / "scripts/benchmarks/fixtures"
+FIXTURE_URL = "https://rawdata-west.oceanobservatories.org/files/fixture/"
+# Size of the file served by the `archive` fixture.
+FILE_SIZE = 100_000
+
+
+@pytest.mark.parametrize(
+    ("pattern", "path"),
+    [
+        ("*.cnv", "a.cnv"),
+        ("*.cnv", "A.CNV"),
+        ("*.cnv", "a.hex"),
+        ("x/*/a.cnv", "x/y/a.cnv"),
+        ("x/*/a.cnv", "x/y/b.cnv"),
+        ("x/?/a.cnv", "x/y/a.cnv"),
+        ("x/[ab]*.hex", "x/B1.hex"),
+        ("x/**", "x/y/z.hex"),
+        ("**/*.cnv", "x/y/a.cnv"),
+    ],
+)
+def test_glob_trie_agrees_with_fnmatch(pattern: str, path: str) -> None:
+    expected = fnmatch.fnmatchcase(path.lower(), pattern.lower())
+    assert bool(GlobTrie([pattern]).match(path)) == expected
+
+
+@pytest.mark.parametrize(
+    ("pattern", "path", "expected"),
+    [
+        # '**' matches zero segments, fnmatch needs the "/" of the pattern.
+        ("**/*.cnv", "a.cnv", True),
+        ("x/**/a.cnv", "x/a.cnv", True),
+        # '*' stays within a segment, fnmatch lets it match "/" too.
+        ("*.cnv", "x/a.cnv", False),
+        ("x/*.cnv", "x/y/a.cnv", False),
+    ],
+)
+def test_glob_trie_matches_whole_segments(pattern: str, path: str, expected: bool) -> None:
+    assert fnmatch.fnmatchcase(path.lower(), pattern.lower()) != expected
+    assert bool(GlobTrie([pattern]).match(path)) == expected
+
+
+def test_glob_trie_reports_every_matching_pattern() -> None:
+    patterns = GlobTrie(["x/*/a.cnv", "**/a.cnv", "**/*.hex"])
+    assert patterns.match("x/y/a.cnv") == [0, 1]
+    assert patterns.match("x/y/b.hex") == [2]
+    assert patterns.match("y/b.cnv") == []
+
+
+def test_glob_trie_prunes_directories() -> None:
+    patterns = GlobTrie(["x/*/a.cnv"])
+    assert patterns.could_contain("x/")
+    assert patterns.could_contain("x/y/")
+    assert not patterns.could_contain("x/y/z/")
+    assert not patterns.could_contain("q/")
+    assert GlobTrie(["x/**"]).could_contain("x/y/z/")
+
+
+@pytest.mark.parametrize(
+    "fixture", sorted(FIXTURES_DIRECTORY.glob("*.html")), ids=lambda path: path.name
+)
+def test_fast_parser_agrees_with_soup(fixture: Path) -> None:
+    html = fixture.read_text(encoding="utf-8")
+    fast = parse_listing_fast(FIXTURE_URL, html)
+    assert fast is not None
+    assert fast == parse_listing_soup(FIXTURE_URL, html)
+    assert fast[0] or fast[1]
+
+
+def test_fast_parser_gives_up_on_unquoted_links() -> None:
+    html = "<pre><a href=a.cnv>a.cnv</a></pre>"
+    assert parse_listing_fast(FIXTURE_URL, html) is None
+    assert parse_listing_soup(FIXTURE_URL, html) == ([], [ListingEntry(FIXTURE_URL + "a.cnv")])
+
+
+@pytest.mark.parametrize(
+    ("size", "expected"),
+    [
+        (0, "0"),
+        (972, "972"),
+        (973, "1.0K"),
+        (1536, "1.5K"),
+        (10188, "9.9K"),
+        (10189, "10K"),
+        (996147, "973K"),
+        (1048576, "1.0M"),
+        (14 * 1048576, "14M"),
+        (5 * 1024**3, "5.0G"),
+    ],
+)
+def test_format_apache_size(size: int, expected: str) -> None:
+    assert format_apache_size(size) == expected
+
+
+def write_local(destination: Path, name: str, size: int) -> Path:
+    local = destination / name
+    local.parent.mkdir(parents=True, exist_ok=True)
+    local.write_bytes(b"x" * size)
+    return local
+
+
+def test_manifest_adopts_file_with_listed_size(tmp_path: Path) -> None:
+    local = write_local(tmp_path, "d/a.cnv", 1536)
+    remote = ListingEntry("https://example.org/files/d/a.cnv", "1.5K", "2024-01-02T03:04:00")
+
+    manifest = DownloadManifest(tmp_path)
+    assert manifest.is_current(local, remote)
+    manifest.save()
+
+    entries = json.loads((tmp_path / DownloadManifest.FILENAME).read_text(encoding="utf-8"))
+    assert entries == {
+        "d/a.cnv": {"size": "1.5K", "modified": "2024-01-02T03:04:00", "bytes": 1536}
+    }
+    # Once recorded, a newer listing no longer matches.
+    assert not DownloadManifest(tmp_path).is_current(local, remote._replace(modified="2025"))
+
+
+@pytest.mark.parametrize("size", [None, "2.0K"])
+def test_manifest_does_not_adopt_unknown_or_other_size(tmp_path: Path, size: str | None) -> None:
+    local = write_local(tmp_path, "a.cnv", 1536)
+    manifest = DownloadManifest(tmp_path)
+    assert not manifest.is_current(local, ListingEntry("https://example.org/files/a.cnv", size))
+    manifest.save()
+    assert not (tmp_path / DownloadManifest.FILENAME).exists()
+
+
+@pytest.fixture
+def archive() -> Iterator[ArchiveServer]:
+    server = start_server(ArchiveShape(depth=0, fan_out=1, files=1, file_size=FILE_SIZE))
+    try:
+        yield server
+    finally:
+        server.shutdown()
+
+
+def download(engine: str, remote: ListingEntry, destination: Path) -> str:
+    if engine == "threads":
+        with requests.Session() as session:
+            return download_file(session, remote, destination)[1]
+
+    async def download_async() -> str:
+        async with httpx.AsyncClient() as client:
+            return (await download_file_async(client, None, remote, destination))[1]
+
+    return asyncio.run(download_async())
+
+
+@pytest.mark.parametrize("engine", ["threads", "async"])
+@pytest.mark.parametrize(
+    ("validator", "offset", "partial"),
+    [
+        # The partial file belongs to the current file: 206 with the rest of it.
+        ("current", 40_000, 1),
+        # The file changed since: If-Range gets the whole file, 200.
+        ('"stale"', 40_000, 0),
+        # The partial file is longer than the remote one: 416, then the whole file.
+        ("current", FILE_SIZE + 5, 0),
+    ],
+    ids=["206", "200", "416"],
+)
+def test_download_resumes_partial_file(
+    archive: ArchiveServer,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    engine: str,
+    validator: str,
+    offset: int,
+    partial: int,
+) -> None:
+    monkeypatch.setattr(download_rawdata, "RETRY_BACKOFF", 0.0)
+    url = archive.base_url + "f000.cnv"
+    content = archive.content("f000.cnv")
+    if validator == "current":
+        validator = requests.head(url, timeout=5).headers["ETag"]
+
+    local = tmp_path / "f000.cnv"
+    (tmp_path / "f000.cnv.part").write_bytes((content + b"extra")[:offset])
+    (tmp_path / "f000.cnv.part.validator").write_text(validator, encoding="utf-8")
+    archive.reset_stats()
+
+    assert download(engine, ListingEntry(url), tmp_path) == "ok"
+    assert local.read_bytes() == content
+    assert archive.stats["partial"] == partial
+    assert archive.stats["files"] == (2 if offset > FILE_SIZE else 1)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["f000.cnv"]
@@ -0,0 +1,68 @@
+"""
+Check `download_rawdata.py --since-last-run` against the fake archive (see
+`scripts/benchmarks/fake_archive.py`).
+"""
+
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from fake_archive import ArchiveServer, ArchiveShape, start_server
+
+DOWNLOAD_SCRIPT = Path(__file__).resolve().parent.parent / "scripts" / "download_rawdata.py"
+
+
+def run_downloader(server: ArchiveServer, tmp_path: Path, *extra: str) -> None:
+    command = [
+        sys.executable,
+        str(DOWNLOAD_SCRIPT),
+        "--base-url",
+        server.base_url,
+        "--destination",
+        str(tmp_path / "raw"),
+        "--listing-cache",
+        str(tmp_path / "listings.json"),
+        "--state-file",
+        str(tmp_path / "state.json"),
+        "--since-last-run",
+        *extra,
+    ]
+    subprocess.run(command, check=True, capture_output=True)
+
+
+def test_rerun_downloads_file_added_two_levels_deep(tmp_path: Path) -> None:
+    server = start_server(ArchiveShape(depth=2, fan_out=2, files=2, file_size=1024))
+    try:
+        run_downloader(server, tmp_path)
+        assert len(list((tmp_path / "raw").rglob("*.cnv"))) == 14
+
+        # Only d01/d00/ gets a new time, the root listing and d01/ look exactly as before.
+        server.add("d01/d00/new.cnv", int(time.time()))
+        server.reset_stats()
+        run_downloader(server, tmp_path)
+
+        assert (tmp_path / "raw" / "d01" / "d00" / "new.cnv").is_file()
+        assert server.stats["files"] == 1
+        assert server.stats["not_modified"] == 6
+    finally:
+        server.shutdown()
+
+
+def test_full_walk_restores_deleted_file(tmp_path: Path) -> None:
+    server = start_server(ArchiveShape(depth=1, fan_out=1, files=2, file_size=1024))
+    try:
+        run_downloader(server, tmp_path)
+        (tmp_path / "raw" / "d00" / "f001.cnv").unlink()
+
+        run_downloader(server, tmp_path)
+        assert not (tmp_path / "raw" / "d00" / "f001.cnv").exists()
+
+        run_downloader(server, tmp_path, "--full")
+        assert (tmp_path / "raw" / "d00" / "f001.cnv").is_file()
+        assert json.loads((tmp_path / "state.json").read_text())["full_walk"] > 0
+    finally:
+        server.shutdown()